@@ -1,20 +1,175 @@
-from openai import OpenAI
+from agent.responsecache import get_response_cache
+from openai import AsyncOpenAI, OpenAI
+import asyncio
+import config
+import json
+import threading
 
 
 class Agent():
-    def __init__(self, system_prompt: str, model='gpt-4o', temperature=1.0):
+    def __init__(self, system_prompt: str, model='gpt-4o', temperature=1.0, use_cache=config.RESPONSE_CACHE):
+        """
+        :param system_prompt: System prompt sent with every request.
+        :param model: Chat model name.
+        :param temperature: Sampling temperature.
+        :param use_cache: Whether identical prompts are answered from the response cache, turn it off
+                          where a fresh sample is wanted on every call.
+        """
         self.system_prompt = system_prompt
         self.model = model
         self.temperature = temperature
         self.client = OpenAI()
+        self.async_client = None
+        self.async_loop = None
+        self.cache = get_response_cache() if use_cache else None
+        # Tokens of the requests that reached the API, cached responses cost none
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.last_usage = None
+        self.usage_lock = threading.Lock()
+
+    def messages(self, user_prompt: str):
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
 
     def complete(self, user_prompt: str) -> str:
-        completion = self.client.chat.completions.create(
+        response = self.cached(user_prompt)
+        if response is None:
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                temperature=self.temperature,
+                messages=self.messages(user_prompt)
+            )
+            self.record_usage(completion.usage)
+            response = self.store(user_prompt, completion.choices[0].message.content)
+        return response
+
+    async def acomplete(self, user_prompt: str) -> str:
+        """
+        Same as complete, but awaits the response instead of blocking, so many requests can be in flight at once.
+        """
+        response = self.cached(user_prompt)
+        if response is None:
+            completion = await self.get_async_client().chat.completions.create(
+                model=self.model,
+                temperature=self.temperature,
+                messages=self.messages(user_prompt)
+            )
+            self.record_usage(completion.usage)
+            response = self.store(user_prompt, completion.choices[0].message.content)
+        return response
+
+    def complete_json(self, user_prompt: str, parse=json.loads):
+        """
+        Same as complete, but parses the response. A response that fails to parse is dropped
+        from the cache, so the next call asks the model again.
+
+        :param parse: Function parsing the response text, raising ValueError (e.g. json.JSONDecodeError) if invalid.
+        """
+        return self.parse_response(user_prompt, self.complete(user_prompt), parse)
+
+    async def acomplete_json(self, user_prompt: str, parse=json.loads):
+        """
+        Same as complete_json, but awaits the response like acomplete.
+        """
+        return self.parse_response(user_prompt, await self.acomplete(user_prompt), parse)
+
+    def parse_response(self, user_prompt: str, response: str, parse):
+        try:
+            return parse(response)
+        except ValueError:
+            self.discard(user_prompt)
+            raise
+
+    def stream(self, user_prompt: str):
+        """
+        Same as complete, but yields the response in chunks as they are generated.
+        """
+        response = self.cached(user_prompt)
+        if response is not None:
+            yield response
+            return
+        chunks = []
+        for chunk in self.client.chat.completions.create(
             model=self.model,
             temperature=self.temperature,
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": user_prompt},
-            ]
-        )
-        return completion.choices[0].message.content
+            messages=self.messages(user_prompt),
+            stream=True,
+            stream_options={"include_usage": True}
+        ):
+            if chunk.usage is not None:
+                # Sent in a last chunk without choices
+                self.record_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+                yield chunks[-1]
+        self.store(user_prompt, ''.join(chunks))
+
+    def record_usage(self, usage):
+        """
+        Add the token counts reported for a request to the totals of the agent.
+        """
+        if usage is None:
+            return
+        last_usage = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+        with self.usage_lock:
+            self.last_usage = last_usage
+            self.usage["calls"] += 1
+            self.usage["prompt_tokens"] += usage.prompt_tokens
+            self.usage["completion_tokens"] += usage.completion_tokens
+
+    def usage_stats(self):
+        """
+        :return: Dictionary with the number of requests that reported usage and their prompt and completion tokens.
+        """
+        with self.usage_lock:
+            return dict(self.usage)
+
+    def cached(self, user_prompt: str):
+        if self.cache is None:
+            return None
+        return self.cache.get(self.model, self.temperature, self.system_prompt, user_prompt)
+
+    def store(self, user_prompt: str, response: str) -> str:
+        if self.cache is not None and response is not None:
+            self.cache.put(self.model, self.temperature, self.system_prompt, user_prompt, response)
+        return response
+
+    def discard(self, user_prompt: str):
+        """
+        Drop the cached response to a prompt, e.g. because it could not be parsed.
+        """
+        if self.cache is not None:
+            self.cache.discard(self.model, self.temperature, self.system_prompt, user_prompt)
+
+    def cache_stats(self):
+        """
+        :return: Dictionary with the hits, misses, entries and bytes of the response cache, None when it is not used.
+        """
+        return self.cache.stats() if self.cache is not None else None
+
+    def get_async_client(self):
+        # Connections of the async client belong to the event loop that opened them,
+        # and every asyncio.run starts a new loop
+        loop = asyncio.get_running_loop()
+        if self.async_loop is not loop:
+            self.async_client = AsyncOpenAI()
+            self.async_loop = loop
+        return self.async_client
+
+    def run_async(self, coroutine):
+        """
+        Run a coroutine making acomplete calls on a new event loop, and close the async client
+        before the loop its connections belong to is closed.
+        """
+        async def run_and_close():
+            try:
+                return await coroutine
+            finally:
+                if self.async_loop is asyncio.get_running_loop():
+                    await self.async_client.close()
+                    self.async_client = None
+                    self.async_loop = None
+
+        return asyncio.run(run_and_close())
@@ -1,4 +1,7 @@
 from agent.agent import Agent
+from typing import List, Tuple
+import asyncio
+import config
 import json
 
 SYSTEM_PROMPT = '''
@@ -90,28 +93,141 @@ DO NOT OUTPUT ANYTHING OTHER THAN THE JSON!!!
 For example, you do not need to enclose the JSON with formatting strings like "```json".
 '''
 
+BATCH_USER_PROMPT = '''
+Below are {n} questions, each followed by the user's answer.
+
+{answers}
+
+For every question, calculate the understanding level of each word of that question. Output a JSON object whose keys are the question numbers ("1" to "{n}") and whose values are maps from each word of the question to its understanding level (a number between 0 and 1), for example:
+{{"1": {{"exception": 1}}, "2": {{"location": 1, "normally": 0, "booking": 0}}}}
+
+Every word of every question must have a score.
+
+DO NOT OUTPUT ANYTHING OTHER THAN THE JSON!!!
+For example, you do not need to enclose the JSON with formatting strings like "```json".
+'''
+
+BATCH_ANSWER = '''**Question {i}:**
+{question}
+
+**User Answer {i}:**
+{user_answer}
+'''
+
+
+def question_words(question: dict) -> List[str]:
+    """
+    :return: The words a question tests, which its understanding map must score.
+    """
+    return list(question['words']) if 'words' in question else [question['word']]
+
+
+def parse_object(response_text: str) -> dict:
+    response = json.loads(response_text.strip())
+    if not isinstance(response, dict):
+        raise ValueError("The response is not a JSON object.")
+    return response
+
+
 class AnalyzerAgent(Agent):
-    def __init__(self):
-        super().__init__(SYSTEM_PROMPT)
+    def __init__(self, max_concurrency=config.GRADING_CONCURRENCY, use_cache=config.RESPONSE_CACHE):
+        """
+        :param max_concurrency: Maximum number of grading requests query_many keeps in flight.
+        :param use_cache: Whether identical answers are graded from the response cache.
+        """
+        super().__init__(SYSTEM_PROMPT, use_cache=use_cache)
+        self.max_concurrency = max_concurrency
 
     def query(self, question, user_answer) -> dict:
-        response_text = self.complete(USER_PROMPT.format(question=question, user_answer=user_answer)).strip()
+        prompt = USER_PROMPT.format(question=question, user_answer=user_answer)
+        return self.complete_json(prompt, self.parse)
+
+    async def aquery(self, question, user_answer) -> dict:
+        prompt = USER_PROMPT.format(question=question, user_answer=user_answer)
+        return await self.acomplete_json(prompt, self.parse)
+
+    def query_many(self, answers: List[Tuple[dict, str]]) -> List[dict]:
+        """
+        Grade many answers concurrently, at most max_concurrency requests at a time.
+
+        :param answers: List of (question, user_answer) pairs.
+        :return: The understanding map of each answer, in the same order.
+        """
+        async def grade_all():
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def grade(question, user_answer):
+                async with semaphore:
+                    return await self.aquery(question, user_answer)
+
+            return await asyncio.gather(*(grade(question, user_answer) for question, user_answer in answers))
+
+        if not answers:
+            return []
+        return self.run_async(grade_all())
+
+    def query_batch(self, answers: List[Tuple[dict, str]]) -> List[dict]:
+        """
+        Grade all answers of a quiz in a single request, so the system prompt is sent once.
+
+        Answers whose understanding map is missing, invalid or does not score every
+        word of the question are graded again one by one with query_many.
+
+        :param answers: List of (question, user_answer) pairs.
+        :return: The understanding map of each answer, in the same order.
+        """
+        if not answers:
+            return []
+        prompt = BATCH_USER_PROMPT.format(n=len(answers), answers='\n'.join(
+            BATCH_ANSWER.format(i=i + 1, question=question, user_answer=user_answer)
+            for i, (question, user_answer) in enumerate(answers)
+        ))
+        try:
+            response = self.complete_json(prompt, parse_object)
+        except ValueError as e:
+            print(f"Batch grading failed ({e}), grading the answers one by one.")
+            return self.query_many(answers)
+
+        output = []
+        for i, (question, _) in enumerate(answers):
+            try:
+                understanding_map = self.validate(response.get(str(i + 1)))
+                missing = [word for word in question_words(question) if word not in understanding_map]
+                if missing:
+                    raise ValueError(f"Words are not scored: {missing}")
+                output.append(understanding_map)
+            except ValueError:
+                output.append(None)
+
+        retry = [i for i, understanding_map in enumerate(output) if understanding_map is None]
+        if retry:
+            print(f"Batch grading left {len(retry)} of {len(answers)} answers incomplete, grading them one by one.")
+            self.discard(prompt)
+            for i, understanding_map in zip(retry, self.query_many([answers[i] for i in retry])):
+                output[i] = understanding_map
+        return output
+
+    def validate(self, understanding_map) -> dict:
+        """
+        Check that an understanding map is a JSON object from words to levels between 0 and 1.
+        """
+        if not isinstance(understanding_map, dict):
+            raise ValueError("The response is not a JSON object.")
+
+        for word, level in understanding_map.items():
+            if not isinstance(word, str):
+                raise ValueError(f"Invalid key type: {word} is not a string.")
+            if not (isinstance(level, float) or isinstance(level, int)):
+                raise ValueError(f"Invalid value type for '{word}': {level} is not a float.")
+            if not (0 <= level <= 1):
+                raise ValueError(f"Understanding level for '{word}' is out of bounds: {level}")
+        return understanding_map
+
+    def parse(self, response_text: str) -> dict:
+        response_text = response_text.strip()
         try:
-            # Parse the JSON response
-            understanding_map = json.loads(response_text)
-            
-            # Validate that the response is a dictionary with float values
-            if not isinstance(understanding_map, dict):
-                raise ValueError("The response is not a JSON object.")
-            
-            for word, level in understanding_map.items():
-                if not isinstance(word, str):
-                    raise ValueError(f"Invalid key type: {word} is not a string.")
-                if not (isinstance(level, float) or isinstance(level, int)):
-                    raise ValueError(f"Invalid value type for '{word}': {level} is not a float.")
-                if not (0 <= level <= 1):
-                    raise ValueError(f"Understanding level for '{word}' is out of bounds: {level}")
-            return understanding_map
+            # Parse the JSON response and validate that it is a dictionary with float values
+            return self.validate(json.loads(response_text))
         
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON response from the model: {e.msg}") from e
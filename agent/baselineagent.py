@@ -1,17 +1,19 @@
 from agent.agent import Agent
-from typing import List, Tuple
+from agent.promptbudget import count_tokens, fit_table
+from typing import Iterable, List, Tuple
 from string import Template
+import asyncio
+import config
 import json
 
 
 SYSTEM_PROMPT = '''You are a vocabulary quiz generator in a word memorization software. Your task is to intelligently create a word list and generate quizzes to improve the user's efficiency in learning new vocabulary based on their requirements and historical performance data.'''
 
-USER_PROMPT_TEMPLATE = Template('''The table below contains five columns:  
+USER_PROMPT_TEMPLATE = Template('''The table below contains four columns:  
 1. **Word**: the vocabulary word,  
 2. **CEFR Level**: the word's difficulty rating based on the CEFR scale,  
 3. **User Memory Score**: a score from 0 to 1, where a higher score indicates better retention,  
-4. **IELTS Vocabulary**: whether the word belongs to IELTS vocabulary (True/False),  
-5. **GRE Vocabulary**: whether the word belongs to GRE vocabulary (True/False).
+4. **Exams**: the exam vocabularies the word belongs to, separated by "/" (e.g. IELTS/GRE), or "none".
 
 $vocab_table
 
@@ -133,14 +135,84 @@ Remember you need to select $n questions and use them to generate $k questions!
 
 Do not output anything other than the JSON Object!!! Also, do not wrap the JSON with a "```json" code block.''')
 
+SHARD_PROMPT_TEMPLATE = Template('''The table below is one part of a vocabulary table and contains four columns:  
+1. **Word**: the vocabulary word,  
+2. **CEFR Level**: the word's difficulty rating based on the CEFR scale,  
+3. **User Memory Score**: a score from 0 to 1, where a higher score indicates better retention,  
+4. **Exams**: the exam vocabularies the word belongs to, separated by "/" (e.g. IELTS/GRE), or "none".
+
+$vocab_table
+
+Based on the user's requirements provided below, select up to $m words of this table that match the conditions and have moderate difficulty and low memory scores:  
+
+$user_input
+
+Only select words from the first column of the table. Output one word per line (all lowercase) and DO NOT OUTPUT ANYTHING OTHER THAN THE WORDS.''')
+
 class BaseLineAgent(Agent):
-    def __init__(self):
-        super().__init__(SYSTEM_PROMPT, model='gpt-4o-mini')
+    def __init__(self, use_cache=config.RESPONSE_CACHE, prompt_budget=config.BASELINE_PROMPT_BUDGET,
+                 shard_size=config.BASELINE_SHARD_SIZE, max_concurrency=config.BASELINE_SHARD_CONCURRENCY):
+        """
+        :param prompt_budget: Maximum prompt tokens, a random sample of the words is sent to fit, 0 for no limit.
+        :param shard_size: Number of words per shard of query_sharded.
+        :param max_concurrency: Maximum number of shard requests query_sharded keeps in flight.
+        """
+        super().__init__(SYSTEM_PROMPT, model='gpt-4o-mini', use_cache=use_cache)
+        self.prompt_budget = prompt_budget or None
+        self.shard_size = shard_size
+        self.max_concurrency = max_concurrency
 
-    def query(self, vocab_table: List[Tuple[str, str, float, bool, bool]], user_input: str, n=10, k=20):
-        vocab_table_str = '\n'.join([f'{word}, {cefr}, {mem}, {ielts}, {gre}' for word, cefr, mem, ielts, gre in vocab_table])
+    def query(self, vocab_table: Iterable[Tuple[str, str, float, str]], user_input: str, n=10, k=20):
+        reserved = count_tokens(
+            self.system_prompt + USER_PROMPT_TEMPLATE.substitute(vocab_table='', n=n, k=k, user_input=user_input),
+            self.model
+        )
+        vocab_table_str, _ = fit_table(vocab_table, self.prompt_budget, reserved, self.model, strategy='sample')
         prompt = USER_PROMPT_TEMPLATE.substitute(
             vocab_table=vocab_table_str, n=n, k=k, user_input=user_input
         )
-        complete = self.complete(prompt)
-        return json.loads(complete)
+        return self.complete_json(prompt)
+
+    async def aselect(self, shard: List[Tuple[str, str, float, str]], user_input: str, m: int) -> List[str]:
+        """
+        Select up to m candidate words of one shard of the vocabulary table.
+        """
+        vocab_table_str, _ = fit_table(shard, None)
+        prompt = SHARD_PROMPT_TEMPLATE.substitute(vocab_table=vocab_table_str, m=m, user_input=user_input)
+        complete = await self.acomplete(prompt)
+        return [word.strip().lower() for word in complete.splitlines() if word.strip()]
+
+    def query_sharded(self, vocab_table: Iterable[Tuple[str, str, float, str]], user_input: str, n=10, k=20):
+        """
+        Same as query, but for tables too large for one prompt: every shard of shard_size words nominates
+        n candidates concurrently (map), then a single query over the candidates selects the n words
+        and generates the k questions (reduce).
+        """
+        rows = list(vocab_table)
+        shards = [rows[start:start + self.shard_size] for start in range(0, len(rows), self.shard_size)]
+
+        async def select_all():
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def select(shard):
+                async with semaphore:
+                    return await self.aselect(shard, user_input, n)
+
+            return await asyncio.gather(*(select(shard) for shard in shards), return_exceptions=True)
+
+        selections = self.run_async(select_all()) if shards else []
+        by_word = {row[0]: row for row in rows}
+        candidates = {}
+        for shard, selection in zip(shards, selections):
+            if isinstance(selection, Exception):
+                # The reduce still sees the other shards
+                print(f"Selecting from the shard starting at '{shard[0][0]}' failed: {selection}")
+                continue
+            # Words the model made up are dropped
+            candidates.update((word, by_word[word]) for word in selection if word in by_word)
+        if not candidates:
+            # Selecting from nothing would only make the model invent words
+            print("No shard nominated a word of the table, selecting from the whole table in one request.")
+            return self.query(rows, user_input, n, k)
+        print(f"Selected {len(candidates)} candidates from {len(shards)} shards.")
+        return self.query(candidates.values(), user_input, n, k)
@@ -0,0 +1,63 @@
+import json
+
+
+class JsonStreamParser:
+    """
+    Incremental parser for a streamed JSON object of arrays, such as
+    {"multiple-choice": [{...}, {...}], "matching": [{...}]}.
+
+    Text is fed as it arrives, and every object inside one of the top-level
+    arrays is returned as soon as its closing brace has been received, together
+    with the key of its array. Text before the top-level object, e.g. a
+    "```json" marker, is ignored.
+    """
+    def __init__(self):
+        self.buffer = ''
+        self.position = 0
+        # Open containers, '{' or '['
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string = None
+        self.key = None
+        self.item_start = None
+
+    def feed(self, text):
+        """
+        :param text: Next chunk of the streamed text.
+        :return: List of (key, object) pairs completed by this chunk.
+        """
+        self.buffer += text
+        completed = []
+        for i in range(self.position, len(self.buffer)):
+            char = self.buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if len(self.stack) == 1:
+                        self.last_string = json.loads(self.buffer[self.string_start:i + 1])
+            elif not self.stack:
+                if char == '{':
+                    self.stack.append(char)
+            elif char == '"':
+                self.in_string = True
+                self.string_start = i
+            elif char in '{[':
+                if len(self.stack) == 1 and char == '[':
+                    # Strings directly in the top-level object are its keys
+                    self.key = self.last_string
+                elif self.stack == ['{', '['] and char == '{':
+                    self.item_start = i
+                self.stack.append(char)
+            elif char in '}]':
+                self.stack.pop()
+                if self.stack == ['{', '['] and char == '}':
+                    completed.append((self.key, json.loads(self.buffer[self.item_start:i + 1])))
+                    self.item_start = None
+        self.position = len(self.buffer)
+        return completed
@@ -0,0 +1,84 @@
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# Characters per token of English text, used when tiktoken is not available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        # tiktoken downloads its vocabularies on first use, which fails offline
+        print(f"Falling back to estimating token counts, tiktoken is unavailable: {e}")
+        return None
+
+
+def count_tokens(text: str, model='gpt-4o') -> int:
+    return count_tokens_many([text], model)[0]
+
+
+def count_tokens_many(texts: List[str], model='gpt-4o') -> List[int]:
+    """
+    :return: Number of tokens of each text, counted with the model's tokenizer, or estimated if tiktoken is unavailable.
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return [-(-len(text) // CHARS_PER_TOKEN) for text in texts]
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
+
+
+def compact_cell(value) -> str:
+    if isinstance(value, float):
+        # Two decimals carry all the precision a rating needs, and 0.0 becomes 0
+        return f'{value:.2f}'.rstrip('0').rstrip('.')
+    return str(value)
+
+
+def fit_table(rows: Iterable[Tuple], budget: Optional[int], reserved_tokens=0, model='gpt-4o', strategy='truncate',
+              seed=0) -> Tuple[str, int]:
+    """
+    Format table rows compactly, one comma separated row per line, and drop rows until the prompt fits its budget.
+
+    Ratings are rounded to two decimals and duplicate rows are left out before any row is dropped.
+
+    :param rows: Rows of cells.
+    :param budget: Maximum number of tokens of the whole prompt, None for no limit.
+    :param reserved_tokens: Number of tokens of the prompt besides the table.
+    :param model: Model whose tokenizer counts the tokens.
+    :param strategy: 'truncate' keeps the first rows, for rows ordered by priority,
+                     'sample' keeps a random sample of the rows in their order.
+    :param seed: Seed of the sample.
+    :return: Tuple of (table text, number of rows kept).
+    """
+    if strategy not in ['truncate', 'sample']:
+        raise ValueError("Strategy must be 'truncate' or 'sample'.")
+    lines = list(dict.fromkeys(', '.join(compact_cell(value) for value in row) for row in rows))
+    if budget is None:
+        return '\n'.join(lines), len(lines)
+
+    # Counted with their newline, which slightly overestimates the last line
+    tokens = np.array(count_tokens_many([line + '\n' for line in lines], model), dtype=np.int64)
+    available = budget - reserved_tokens
+    if tokens.sum() <= available:
+        return '\n'.join(lines), len(lines)
+
+    order = np.arange(len(lines))
+    if strategy == 'sample':
+        order = np.random.default_rng(seed).permutation(len(lines))
+    kept = np.sort(order[:np.searchsorted(np.cumsum(tokens[order]), available, side='right')])
+    print(f"Prompt budget of {budget} tokens: kept {len(kept)} of {len(lines)} rows.")
+    return '\n'.join(lines[i] for i in kept), len(kept)
@@ -1,5 +1,6 @@
 from agent.agent import Agent
 from typing import List
+import config
 import json
 from string import Template
 
@@ -95,8 +96,8 @@ DO NOT enclose the JSON with formatting strings like "```json" !!!
 ''')
 
 class QueryAgent(Agent):
-    def __init__(self):
-        super().__init__(SYSTEM_PROMPT, temperature=0.7)
+    def __init__(self, use_cache=config.RESPONSE_CACHE):
+        super().__init__(SYSTEM_PROMPT, temperature=0.7, use_cache=use_cache)
     
     def trim_json_markers(self, text):
         # Remove the opening and closing markers
@@ -107,7 +108,5 @@ class QueryAgent(Agent):
         return text
 
     def query(self, user_input: str, k=5) -> List[str]:
-        complete = self.complete(USER_PROMPT_TEMPLATE.substitute(
-            user_input=user_input, k=k
-        ))
-        return json.loads(self.trim_json_markers(complete))
+        prompt = USER_PROMPT_TEMPLATE.substitute(user_input=user_input, k=k)
+        return self.complete_json(prompt, lambda response: json.loads(self.trim_json_markers(response)))
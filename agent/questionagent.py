@@ -1,4 +1,5 @@
 from agent.agent import Agent
+from agent.jsonstream import JsonStreamParser
 import json
 import random
 
@@ -182,20 +183,39 @@ For example, do not enclose the JSON with formatting strings like "```json".
 
 
 class QuestionAgent(Agent):
-    def __init__(self):
-        super().__init__(SYSTEM_PROMPT, temperature=0.7)
+    def __init__(self, use_cache=False):
+        # Every session should get fresh questions, even for the same words
+        super().__init__(SYSTEM_PROMPT, temperature=0.7, use_cache=use_cache)
 
     def query(self, word_list, num_questions=20):
-        questions = json.loads(self.complete(USER_PROMPT.format(word_list=", ".join(word_list), n=len(word_list), k=num_questions)).strip())
+        prompt = USER_PROMPT.format(word_list=", ".join(word_list), n=len(word_list), k=num_questions)
+        questions = self.complete_json(prompt)
         for i in range(len(questions['matching'])):
-            data = questions['matching'][i]
-            indices = list(range(len(data["words"])))
-            random.shuffle(indices)
-            shuffled_words = [data["words"][i] for i in indices]
-            shuffled_matches = {str(indices.index(int(k) - 1) + 1): v for k, v in data["correct_matches"].items()}
-            questions['matching'][i] = {
-                    "words": shuffled_words,
-                    "definitions": data["definitions"],
-                    "correct_matches": shuffled_matches
-            }
-        return questions
\ No newline at end of file
+            questions['matching'][i] = self.shuffle_matching(questions['matching'][i])
+        return questions
+
+    def query_stream(self, word_list, num_questions=20):
+        """
+        Generate questions like query, but yield each one as soon as the model has finished writing it.
+
+        :return: Generator of (question type, question) pairs, e.g. ("multiple-choice", {...}).
+        """
+        parser = JsonStreamParser()
+        prompt = USER_PROMPT.format(word_list=", ".join(word_list), n=len(word_list), k=num_questions)
+        for chunk in self.stream(prompt):
+            for question_type, question in parser.feed(chunk):
+                if question_type == 'matching':
+                    question = self.shuffle_matching(question)
+                yield question_type, question
+
+    def shuffle_matching(self, data):
+        # The model tends to list the words in the order of their definitions
+        indices = list(range(len(data["words"])))
+        random.shuffle(indices)
+        shuffled_words = [data["words"][i] for i in indices]
+        shuffled_matches = {str(indices.index(int(k) - 1) + 1): v for k, v in data["correct_matches"].items()}
+        return {
+                "words": shuffled_words,
+                "definitions": data["definitions"],
+                "correct_matches": shuffled_matches
+        }
\ No newline at end of file
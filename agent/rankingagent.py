@@ -1,5 +1,7 @@
 from agent.agent import Agent
+from agent.promptbudget import count_tokens, fit_table
 from typing import List, Tuple
+import config
 
 
 SYSTEM_PROMPT = '''You are an AI language assistant tasked with recommending {k} words for me to memorize today from the following vocabulary table. Each entry in the table includes:
@@ -33,10 +35,17 @@ Using the above instructions and vocabulary table, generate a list of {k} words
 
 
 class RankingAgent(Agent):
-    def __init__(self):
-        super().__init__(SYSTEM_PROMPT)
-
-    def query(self, vocab_table: List[Tuple[str, str, float]], num_words=10) -> List[str]:
-        vocab_table_str = '\n'.join([f'{word}, {cefr}, {mem}' for word, cefr, mem in vocab_table])
+    def __init__(self, use_cache=config.RESPONSE_CACHE, prompt_budget=config.RANKING_PROMPT_BUDGET):
+        """
+        :param prompt_budget: Maximum prompt tokens, the least similar candidates are left out to fit, 0 for no limit.
+        """
+        super().__init__(SYSTEM_PROMPT, use_cache=use_cache)
+        self.prompt_budget = prompt_budget or None
+
+    def query(self, vocab_table: List[Tuple[str, str, float]], num_words=10, keywords=None, exam=None) -> List[str]:
+        # keywords and exam are accepted for compatibility with LocalRanker, the table is already filtered by them
+        # Candidates come ordered by similarity, so the table is cut from the end
+        reserved = count_tokens(self.system_prompt + USER_PROMPT.format(k=num_words, vocab_table=''), self.model)
+        vocab_table_str, _ = fit_table(vocab_table, self.prompt_budget, reserved, self.model)
         complete = self.complete(USER_PROMPT.format(k=num_words, vocab_table=vocab_table_str))
         return [word.strip() for word in complete.splitlines() if word.strip()]
@@ -0,0 +1,106 @@
+from functools import lru_cache
+from sqlitestore import connect
+import config
+import hashlib
+import threading
+import time
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode('utf8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent cache of chat completions keyed by (model, temperature, system prompt hash, user prompt hash).
+
+    Entries older than ttl seconds are expired, and once the responses take more than
+    max_bytes the least recently used ones are evicted.
+    """
+    def __init__(self, path=config.RESPONSE_CACHE_PATH, max_bytes=config.RESPONSE_CACHE_MAX_BYTES,
+                 ttl=config.RESPONSE_CACHE_TTL):
+        """
+        :param path: Path of the SQLite database.
+        :param max_bytes: Maximum total size of the cached responses.
+        :param ttl: Seconds after which a cached response expires.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.conn = connect(path)
+        self.lock = threading.Lock()
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'model TEXT NOT NULL, temperature REAL NOT NULL, system_hash TEXT NOT NULL, user_hash TEXT NOT NULL, '
+            'response TEXT NOT NULL, size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL, '
+            'PRIMARY KEY (model, temperature, system_hash, user_hash))'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self.conn.commit()
+
+    def get(self, model, temperature, system_prompt, user_prompt):
+        """
+        :return: The cached response, or None if there is none or it has expired.
+        """
+        key = (model, temperature, prompt_hash(system_prompt), prompt_hash(user_prompt))
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                'SELECT response FROM responses WHERE model = ? AND temperature = ? AND system_hash = ? '
+                'AND user_hash = ? AND created_at >= ?', (*key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute(
+                'UPDATE responses SET accessed_at = ? WHERE model = ? AND temperature = ? AND system_hash = ? '
+                'AND user_hash = ?', (now, *key)
+            )
+            return row[0]
+
+    def put(self, model, temperature, system_prompt, user_prompt, response):
+        """
+        Store a response, then evict expired and least recently used entries.
+        """
+        key = (model, temperature, prompt_hash(system_prompt), prompt_hash(user_prompt))
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (model, temperature, system_hash, user_hash, response, size, '
+                'created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (*key, response, len(response.encode('utf8')), now, now)
+            )
+            self.conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.ttl,))
+            # Keep the most recently used responses that fit in max_bytes
+            self.conn.execute(
+                'DELETE FROM responses WHERE rowid IN (SELECT rowid FROM ('
+                'SELECT rowid, SUM(size) OVER (ORDER BY accessed_at DESC, rowid DESC) AS total FROM responses'
+                ') WHERE total > ?)', (self.max_bytes,)
+            )
+
+    def discard(self, model, temperature, system_prompt, user_prompt):
+        key = (model, temperature, prompt_hash(system_prompt), prompt_hash(user_prompt))
+        with self.lock, self.conn:
+            self.conn.execute(
+                'DELETE FROM responses WHERE model = ? AND temperature = ? AND system_hash = ? AND user_hash = ?', key
+            )
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM responses')
+
+    def stats(self):
+        """
+        :return: Dictionary with the hits, misses, number of entries and their total size in bytes.
+        """
+        with self.lock:
+            entries, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+@lru_cache(maxsize=None)
+def get_response_cache(path=config.RESPONSE_CACHE_PATH):
+    # Shared by every agent of the process, so the statistics cover all of them
+    return ResponseCache(path)
@@ -0,0 +1,74 @@
+class Backend():
+    """
+    Storage and similarity search behind VectorDB.
+
+    Records are identified by their word. Metadata values are str, bool, int or
+    float. Filters use the chromadb `where` syntax: {key: value} for equality,
+    {key: {"$op": value}} with $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, and
+    {"$and": [...]} / {"$or": [...]} to combine them. Integer bitmask keys can
+    also be filtered with {key: {"$bits_any": mask}} (some bit of mask is set)
+    and {key: {"$bits_all": mask}} (every bit of mask is set).
+    """
+
+    def count(self):
+        """
+        :return: Number of records in the store.
+        """
+        raise NotImplementedError
+
+    def add(self, ids, embeddings, metadatas, batch_size=1000):
+        """
+        Add new records.
+
+        :param ids: List of words.
+        :param embeddings: Embeddings of the words, a list of vectors or an array of shape (n, dim).
+        :param metadatas: List of metadata dictionaries.
+        :param batch_size: Maximum number of records written per call, for stores that need it.
+        """
+        raise NotImplementedError
+
+    def get(self, ids=None, where=None, include_embeddings=False):
+        """
+        Fetch records by word and/or metadata filter. Words that do not exist are skipped.
+
+        :param ids: List of words to fetch, None for all records.
+        :param where: Metadata filter, None for no filter.
+        :param include_embeddings: Whether to include the embeddings in the result.
+        :return: Dictionary with "ids", "metadatas" and, if requested, "embeddings".
+        """
+        raise NotImplementedError
+
+    def query(self, query_embeddings, n_results, where=None):
+        """
+        Find the nearest records of each query embedding.
+
+        :param query_embeddings: List of query vectors.
+        :param n_results: Number of results per query.
+        :param where: Metadata filter, None for no filter.
+        :return: Dictionary with "ids", "metadatas" and "distances", each a list with one list per query.
+        """
+        raise NotImplementedError
+
+    def update(self, ids, metadatas, embeddings=None):
+        """
+        Set metadata keys of existing records, and their embeddings if given. Keys a
+        dictionary leaves out keep their stored values.
+
+        :param ids: List of words.
+        :param metadatas: List of metadata dictionaries.
+        :param embeddings: New embeddings of the words, None to leave them untouched.
+        """
+        raise NotImplementedError
+
+    def delete(self, ids):
+        """
+        Delete records.
+
+        :param ids: List of words.
+        """
+        raise NotImplementedError
+
+    def persist(self):
+        """
+        Write changes the store buffers in memory to disk. Stores that persist every write need not override it.
+        """
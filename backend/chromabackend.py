@@ -0,0 +1,139 @@
+from backend.backend import Backend
+import chromadb
+
+
+# Records written per call, well below chromadb's maximum batch size
+BATCH_SIZE = 1000
+
+
+def has_bit_filters(where):
+    if not isinstance(where, dict):
+        return False
+    return any(
+        any(has_bit_filters(clause) for clause in condition) if key in ['$and', '$or']
+        else isinstance(condition, dict) and ('$bits_any' in condition or '$bits_all' in condition)
+        for key, condition in where.items()
+    )
+
+
+def expand_bit_filters(where, stored_masks):
+    """
+    Rewrite $bits_any / $bits_all, which chromadb does not support, into $in over
+    the masks stored in the collection that satisfy them.
+
+    :param stored_masks: Distinct values of the filtered key in the collection.
+    """
+    if not isinstance(where, dict):
+        return where
+    output = {}
+    for key, condition in where.items():
+        if key in ['$and', '$or']:
+            output[key] = [expand_bit_filters(clause, stored_masks) for clause in condition]
+        elif isinstance(condition, dict) and ('$bits_any' in condition or '$bits_all' in condition):
+            masks = sorted(stored_masks)
+            condition = dict(condition)
+            if '$bits_any' in condition:
+                mask = condition.pop('$bits_any')
+                masks = [value for value in masks if value & mask]
+            if '$bits_all' in condition:
+                mask = condition.pop('$bits_all')
+                masks = [value for value in masks if value & mask == mask]
+            # chromadb rejects an empty $in, and masks are never negative
+            condition['$in'] = masks or [-1]
+            output[key] = condition
+        else:
+            output[key] = condition
+    return output
+
+
+class ChromaBackend(Backend):
+    def __init__(self, persist_directory="./chromadb", collection_name="words_collection"):
+        """
+        :param persist_directory: Directory to persist the ChromaDB database.
+        :param collection_name: Name of the collection holding the words.
+        """
+        self.client = chromadb.PersistentClient(path=persist_directory)
+
+        # Check if collection exists; if so, reuse it
+        existing_collections = [col.name for col in self.client.list_collections()]
+        if collection_name in existing_collections:
+            self.collection = self.client.get_collection(name=collection_name)
+        else:
+            print("Collection is not found, creating a new one.")
+            self.collection = self.client.create_collection(name=collection_name)
+        # Distinct exam masks stored, loaded on the first bit filter and reloaded after deletes
+        self.exam_masks = None
+
+    def stored_exam_masks(self):
+        """
+        :return: Set of the distinct exam masks stored, including ones other processes wrote since the last call.
+                 Masks whose words another process deleted may linger, which only adds values to the $in that
+                 match nothing.
+        """
+        if not self.exam_masks:
+            metadatas = self.collection.get(include=["metadatas"])["metadatas"]
+            self.exam_masks = {metadata["exams"] for metadata in metadatas if "exams" in metadata}
+            return self.exam_masks
+        # Far cheaper than a scan: one indexed lookup, plus one per mask found that was not known yet
+        while True:
+            # $nin also matches words without the key, which $gte leaves out
+            unknown = {"$and": [{"exams": {"$nin": sorted(self.exam_masks)}}, {"exams": {"$gte": 0}}]}
+            new = self.collection.get(where=unknown, include=["metadatas"], limit=1)["metadatas"]
+            if not new:
+                return self.exam_masks
+            self.exam_masks.add(new[0]["exams"])
+
+    def expand(self, where):
+        if not has_bit_filters(where):
+            return where
+        return expand_bit_filters(where, self.stored_exam_masks())
+
+    def track_exam_masks(self, metadatas):
+        if self.exam_masks is not None:
+            self.exam_masks.update(metadata["exams"] for metadata in metadatas if "exams" in metadata)
+
+    def count(self):
+        return self.collection.count()
+
+    def add(self, ids, embeddings, metadatas, batch_size=BATCH_SIZE):
+        self.track_exam_masks(metadatas)
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self.collection.add(
+                documents=list(ids[start:end]),
+                metadatas=metadatas[start:end],
+                embeddings=embeddings[start:end],
+                ids=list(ids[start:end])
+            )
+
+    def get(self, ids=None, where=None, include_embeddings=False):
+        include = ["metadatas", "embeddings"] if include_embeddings else ["metadatas"]
+        results = self.collection.get(ids=ids, where=self.expand(where), include=include)
+        output = {"ids": results["ids"], "metadatas": results["metadatas"]}
+        if include_embeddings:
+            output["embeddings"] = results["embeddings"]
+        return output
+
+    def query(self, query_embeddings, n_results, where=None):
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=self.expand(where),
+            include=["metadatas", "distances"]
+        )
+        return {"ids": results["ids"], "metadatas": results["metadatas"], "distances": results["distances"]}
+
+    def update(self, ids, metadatas, embeddings=None):
+        self.track_exam_masks(metadatas)
+        for start in range(0, len(ids), BATCH_SIZE):
+            end = start + BATCH_SIZE
+            self.collection.update(
+                ids=list(ids[start:end]),
+                metadatas=metadatas[start:end],
+                embeddings=embeddings[start:end] if embeddings is not None else None
+            )
+
+    def delete(self, ids):
+        self.exam_masks = None
+        for start in range(0, len(ids), BATCH_SIZE):
+            self.collection.delete(ids=list(ids[start:start + BATCH_SIZE]))
@@ -0,0 +1,275 @@
+from backend.backend import Backend
+from exitflush import register_flush_on_exit
+import numpy as np
+import os
+import tempfile
+import time
+
+
+COMPARISONS = {
+    '$eq': np.equal,
+    '$ne': np.not_equal,
+    '$gt': np.greater,
+    '$gte': np.greater_equal,
+    '$lt': np.less,
+    '$lte': np.less_equal,
+    '$in': np.isin,
+    '$nin': lambda column, values: ~np.isin(column, values),
+    '$bits_any': lambda column, mask: (column & mask) != 0,
+    '$bits_all': lambda column, mask: (column & mask) == mask,
+}
+
+
+# Writes are buffered and saved together after this many, or this many seconds after the last save
+SAVE_EVERY_WRITES = 100
+SAVE_INTERVAL = 5.0
+
+def to_column(values):
+    """
+    Convert metadata values to a typed array: bool, int64, float64 or unicode.
+    """
+    column = np.asarray(values)
+    if column.dtype.kind in 'biuf':
+        return column.astype(np.int64 if column.dtype.kind in 'iu' else column.dtype)
+    return column.astype(str)
+
+
+def replace_file(path, write):
+    """
+    Write a file next to path and move it into place, so path is never left half written.
+
+    :param path: Path of the file to replace.
+    :param write: Function writing the contents to the open binary file it is given.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+class NumpyBackend(Backend):
+    """
+    In-memory store: a float32 embedding matrix and one typed array per metadata key.
+
+    Embeddings are persisted to embeddings.npy and ids/metadata to metadata.npz in
+    persist_directory, so a metadata update does not rewrite the matrix. Both files are
+    replaced atomically, and a pair whose lengths differ is rejected on load. Writes are
+    buffered and saved every SAVE_EVERY_WRITES writes, after SAVE_INTERVAL seconds,
+    on persist() or at exit, so adding words one by one does not rewrite the files each time.
+    """
+
+    def __init__(self, persist_directory="./numpydb", space="l2"):
+        """
+        :param persist_directory: Directory to persist the arrays.
+        :param space: Distance used by queries, 'l2' (squared L2, the chromadb default) or 'cosine'.
+        """
+        if space not in ['l2', 'cosine']:
+            raise ValueError("Space must be 'l2' or 'cosine'.")
+        self.persist_directory = persist_directory
+        self.space = space
+        self.embeddings_path = os.path.join(persist_directory, 'embeddings.npy')
+        self.metadata_path = os.path.join(persist_directory, 'metadata.npz')
+
+        if os.path.exists(self.embeddings_path) and os.path.exists(self.metadata_path):
+            self.embeddings = np.load(self.embeddings_path)
+            with np.load(self.metadata_path) as data:
+                self.ids = data['ids']
+                self.columns = {key[len('meta_'):]: data[key] for key in data.files if key.startswith('meta_')}
+            lengths = {len(self.embeddings), *(len(column) for column in self.columns.values())}
+            if lengths != {len(self.ids)}:
+                raise ValueError(
+                    f"{self.embeddings_path} and {self.metadata_path} do not match: {len(self.ids)} ids, "
+                    f"{len(self.embeddings)} embeddings. Restore both from the same save, "
+                    f"or delete them and re-run setup.py."
+                )
+        else:
+            print("Collection is not found, creating a new one.")
+            self.embeddings = None
+            self.ids = np.zeros(0, dtype=str)
+            self.columns = {}
+        self.unsaved_embeddings = False
+        self.unsaved_metadata = False
+        self.unsaved_writes = 0
+        self.last_save = time.monotonic()
+        self._reindex()
+        register_flush_on_exit(self, 'persist')
+
+    def __del__(self):
+        if 'unsaved_writes' in self.__dict__:
+            self.persist()
+
+    def _reindex(self):
+        self.index = {word: i for i, word in enumerate(self.ids.tolist())}
+        if self.embeddings is None:
+            self.sq_norms = self.normalized = None
+        elif self.space == 'l2':
+            self.sq_norms = np.einsum('ij,ij->i', self.embeddings, self.embeddings)
+        else:
+            norms = np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+            self.normalized = self.embeddings / np.maximum(norms, np.finfo(np.float32).tiny)
+
+    def _save(self, embeddings=True):
+        self.unsaved_embeddings |= embeddings
+        self.unsaved_metadata = True
+        self.unsaved_writes += 1
+        if self.unsaved_writes >= SAVE_EVERY_WRITES or time.monotonic() - self.last_save >= SAVE_INTERVAL:
+            self.persist()
+
+    def persist(self):
+        if self.unsaved_metadata:
+            os.makedirs(self.persist_directory, exist_ok=True)
+            # Each file is replaced whole; a crash between the two is caught by the length check on load
+            if self.unsaved_embeddings:
+                replace_file(self.embeddings_path, lambda f: np.save(f, self.embeddings))
+            replace_file(self.metadata_path, lambda f: np.savez(
+                f, ids=self.ids, **{'meta_' + key: column for key, column in self.columns.items()}
+            ))
+        self.unsaved_embeddings = self.unsaved_metadata = False
+        self.unsaved_writes = 0
+        self.last_save = time.monotonic()
+
+    def _rows(self, metadatas):
+        # Keys a record does not have are filled with the empty value of the column type
+        keys = dict.fromkeys([*self.columns, *(key for metadata in metadatas for key in metadata)])
+        rows = {}
+        for key in keys:
+            present = [metadata[key] for metadata in metadatas if key in metadata]
+            default = to_column(present)[:0] if present else self.columns[key][:0]
+            fill = np.zeros(1, dtype=default.dtype).item()
+            rows[key] = to_column([metadata.get(key, fill) for metadata in metadatas]).astype(default.dtype)
+            if key not in self.columns and self.embeddings is not None:
+                self.columns[key] = np.zeros(len(self.ids), dtype=default.dtype)
+        return rows
+
+    def _metadatas(self, rows):
+        values = {key: column[rows].tolist() for key, column in self.columns.items()}
+        return [dict(zip(values, row)) for row in zip(*values.values())] if values else [{} for _ in rows]
+
+    def _match(self, where):
+        """
+        Evaluate a chromadb-style filter on the metadata columns.
+
+        :return: Boolean mask over the records.
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, condition in where.items():
+            if key == '$and':
+                for clause in condition:
+                    mask &= self._match(clause)
+            elif key == '$or':
+                mask &= np.logical_or.reduce([self._match(clause) for clause in condition])
+            else:
+                if not isinstance(condition, dict):
+                    condition = {'$eq': condition}
+                if key not in self.columns:
+                    # Like chromadb, records without the key match no condition on it
+                    mask &= False
+                    continue
+                column = self.columns[key]
+                for op, value in condition.items():
+                    mask &= COMPARISONS[op](column, value)
+        return mask
+
+    def count(self):
+        return len(self.ids)
+
+    def add(self, ids, embeddings, metadatas, batch_size=1000):
+        if not len(ids):
+            return
+        duplicates = [word for word in ids if word in self.index]
+        if duplicates or len(set(ids)) != len(ids):
+            raise ValueError(f"Words already exist in the database: {duplicates[:10]}")
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        rows = self._rows(metadatas)
+        if self.embeddings is None:
+            self.embeddings = embeddings
+            self.columns = rows
+        else:
+            self.embeddings = np.concatenate([self.embeddings, embeddings])
+            self.columns = {key: np.concatenate([self.columns[key], rows[key]]) for key in self.columns}
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=str)])
+        self._reindex()
+        self._save()
+
+    def get(self, ids=None, where=None, include_embeddings=False):
+        if ids is None:
+            rows = np.arange(len(self.ids))
+        else:
+            rows = np.fromiter((self.index[word] for word in ids if word in self.index), dtype=np.int64)
+        if where:
+            rows = rows[self._match(where)[rows]]
+
+        output = {"ids": self.ids[rows].tolist(), "metadatas": self._metadatas(rows)}
+        if include_embeddings:
+            output["embeddings"] = self.embeddings[rows] if self.embeddings is not None else np.zeros((0, 0), dtype=np.float32)
+        return output
+
+    def query(self, query_embeddings, n_results, where=None):
+        output = {"ids": [], "metadatas": [], "distances": []}
+        if self.embeddings is None:
+            for _ in query_embeddings:
+                for key in output:
+                    output[key].append([])
+            return output
+
+        candidates = np.arange(len(self.ids))
+        matrix = self.embeddings if self.space == 'l2' else self.normalized
+        sq_norms = self.sq_norms
+        if where:
+            candidates = np.flatnonzero(self._match(where))
+            matrix = matrix[candidates]
+            sq_norms = sq_norms[candidates] if sq_norms is not None else None
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.embeddings.shape[1])
+        if self.space == 'l2':
+            dists = sq_norms[None, :] - 2 * queries @ matrix.T
+            dists += np.einsum('ij,ij->i', queries, queries)[:, None]
+        else:
+            queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), np.finfo(np.float32).tiny)
+            dists = 1 - queries @ matrix.T
+
+        k = min(n_results, len(candidates))
+        for dist in dists:
+            top = np.argpartition(dist, k - 1)[:k] if 0 < k < len(dist) else np.arange(k)
+            top = top[np.argsort(dist[top], kind='stable')]
+            rows = candidates[top]
+            output["ids"].append(self.ids[rows].tolist())
+            output["metadatas"].append(self._metadatas(rows))
+            output["distances"].append(dist[top].tolist())
+        return output
+
+    def update(self, ids, metadatas, embeddings=None):
+        if not len(ids):
+            return
+        rows = np.fromiter((self.index[word] for word in ids), dtype=np.int64)
+        values = self._rows(metadatas)
+        given = {key for metadata in metadatas for key in metadata}
+        for key, column in values.items():
+            if key not in given:
+                continue
+            # Upcast e.g. an int column receiving floats
+            dtype = np.result_type(self.columns[key], column)
+            if dtype != self.columns[key].dtype:
+                self.columns[key] = self.columns[key].astype(dtype)
+            self.columns[key][rows] = column
+        if embeddings is not None:
+            self.embeddings[rows] = np.asarray(embeddings, dtype=np.float32)
+            self._reindex()
+        self._save(embeddings=embeddings is not None)
+
+    def delete(self, ids):
+        rows = [self.index[word] for word in ids if word in self.index]
+        if not rows:
+            return
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[rows] = False
+        self.ids = self.ids[keep]
+        self.embeddings = self.embeddings[keep]
+        self.columns = {key: column[keep] for key, column in self.columns.items()}
+        self._reindex()
+        self._save()
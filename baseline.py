@@ -1,6 +1,8 @@
 from agent.baselineagent import BaseLineAgent
-from vectordb import VectorDB
+from vectordb import VectorDB, MASTERED_RATING
+from exams import exam_names
 from quiz import Quiz
+import config
 import json
 
 
@@ -11,11 +13,14 @@ class BaseLine:
 
     def run(self):
         user_input = input("Enter your learning goal: ").strip()
-        vocab = self.db.query_all()
-        vocab_table = []
-        for row in vocab:
-            vocab_table.append((row['word'], row['CEFR'], row['understanding_rating'], row['IELTS'], row['GRE']))
-        result = self.agent.query(vocab_table, user_input)
+        vocab = self.db.query_all(as_columns=True)
+        # Mastered words are never selected, so they are not worth their tokens
+        unmastered = vocab['understanding_rating'] < MASTERED_RATING
+        vocab = {key: column[unmastered] for key, column in vocab.items()}
+        exams = ['/'.join(exam_names(mask)) or 'none' for mask in vocab['exams'].tolist()]
+        vocab_table = zip(*(vocab[key].tolist() for key in ['word', 'CEFR', 'understanding_rating']), exams)
+        query = self.agent.query_sharded if config.BASELINE_MODE == 'sharded' else self.agent.query
+        result = query(vocab_table, user_input)
         print('Selected words:', result['words'])
         quiz = Quiz(questions_json=json.dumps(result['questions']))
         while True:
@@ -0,0 +1,49 @@
+from benchmark.mockserver import MockCompletionHandler, start_mock_server
+import json
+import time
+
+
+LATENCY = 0.5
+NUM_QUESTIONS = 10
+
+
+class MockGradingHandler(MockCompletionHandler):
+    """
+    Answers every chat completion after LATENCY seconds, rating the word of each question 1.
+    """
+    def reply(self, request):
+        time.sleep(LATENCY)
+        num_questions = request['messages'][-1]['content'].count('**Question ')
+        if num_questions:
+            return json.dumps({str(i + 1): {'word': 1} for i in range(num_questions)})
+        return '{"word": 1}'
+
+
+def benchmark():
+    server = start_mock_server(MockGradingHandler)
+
+    from agent.analyzeragent import AnalyzerAgent
+    agent = AnalyzerAgent(use_cache=False)
+    answers = [({'word': 'word', 'question': f'Question {i}'}, 'A') for i in range(NUM_QUESTIONS)]
+
+    start = time.perf_counter()
+    for question, user_answer in answers:
+        agent.query(question, user_answer)
+    serial = time.perf_counter() - start
+
+    print(f'{NUM_QUESTIONS} answers, {LATENCY * 1000:.0f} ms per request')
+    print(f'query loop:         {serial:6.2f} s')
+    for max_concurrency in [1, 4, NUM_QUESTIONS]:
+        agent.max_concurrency = max_concurrency
+        start = time.perf_counter()
+        agent.query_many(answers)
+        print(f'query_many (max {max_concurrency:>2}): {time.perf_counter() - start:6.2f} s')
+
+    start = time.perf_counter()
+    agent.query_batch(answers)
+    print(f'query_batch:        {time.perf_counter() - start:6.2f} s')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,50 @@
+from vectordb import VectorDB
+import numpy as np
+import tempfile
+import time
+
+
+SIZES = [5_000, 50_000, 400_000]
+CEFR_LEVELS = ['a1', 'a2', 'b1', 'b2', 'c1', 'c2']
+
+
+def make_rows(n, dim, rng):
+    words = [f'word{i}' for i in range(n)]
+    embeddings = rng.standard_normal((n, dim)).astype(np.float32)
+    cefr = rng.choice(CEFR_LEVELS, n).tolist()
+    # Bit 0 set for 30% of the words, bit 1 for 10%
+    exams = ((rng.random(n) < 0.3) | (rng.random(n) < 0.1) << 1).astype(int).tolist()
+    return words, embeddings, cefr, exams
+
+
+def time_queries(db, queries, n_results):
+    start = time.perf_counter()
+    for query in queries:
+        db.query_by_similarity(query.tolist(), n_results=n_results)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def benchmark(dim=50, num_queries=50, backends=('chroma', 'numpy')):
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((num_queries, dim)).astype(np.float32)
+    print(f'{"rows":>8} {"backend":>8} {"ingest (s)":>11} {"open (s)":>9} {"top-10 (ms)":>12} {"top-200 (ms)":>13}')
+    for n in SIZES:
+        rows = make_rows(n, dim, rng)
+        for backend in backends:
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                VectorDB(persist_directory=directory, backend=backend).add_words(*rows, batch_size=5000)
+                ingest = time.perf_counter() - start
+
+                start = time.perf_counter()
+                db = VectorDB(persist_directory=directory, backend=backend)
+                opened = time.perf_counter() - start
+
+                db.query_by_similarity(queries[0].tolist(), n_results=10)  # warm up
+                top10 = time_queries(db, queries, 10)
+                top200 = time_queries(db, queries, 200)
+                print(f'{n:>8} {backend:>8} {ingest:>11.2f} {opened:>9.2f} {top10:>12.2f} {top200:>13.2f}')
+
+
+if __name__ == '__main__':
+    benchmark()
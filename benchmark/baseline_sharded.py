@@ -0,0 +1,105 @@
+from benchmark.mockserver import MockCompletionHandler, start_mock_server
+from contextlib import redirect_stdout
+import argparse
+import io
+import json
+import numpy as np
+import os
+import re
+import time
+
+
+NUM_WORDS = 10
+NUM_QUESTIONS = 20
+GOALS = [
+    ('I want to learn words related to traveling in the IELTS word list.',
+     ['travel', 'airport', 'hotel', 'passport', 'journey'], 'IELTS'),
+    ('I am preparing for the GRE and want words used in scientific arguments.',
+     ['argument', 'evidence', 'theory', 'hypothesis', 'analysis'], 'GRE'),
+    ('I want to talk about health and visiting the doctor.',
+     ['health', 'disease', 'medicine', 'doctor', 'hospital'], None),
+]
+
+# The mock model reads PREFILL_LATENCY and writes DECODE_LATENCY seconds per token
+PREFILL_LATENCY = 0.00005
+DECODE_LATENCY = 0.01
+CEFR_LEVELS = ['a1', 'a2', 'b1', 'b2', 'c1', 'c2']
+ROW = re.compile(r'^(.+), (a1|a2|b1|b2|c1|c2), ([\d.]+), (\S+)$', re.MULTILINE)
+
+
+class MockBaseLineHandler(MockCompletionHandler):
+    """
+    Selects the words of moderate difficulty with the lowest memory scores of the table in the prompt,
+    preferring words of the exam the user mentions, and writes a short-answer question per question asked.
+    """
+    def reply(self, request):
+        prompt = request['messages'][-1]['content']
+        rows = ROW.findall(prompt)
+        exams = {exam for row in rows for exam in row[3].split('/')} - {'none'}
+        user_input = re.search(r'low memory scores:\s*\n\n(.*?)\n\n', prompt, re.S).group(1)
+        mentioned = [exam for exam in exams if exam in user_input.upper()]
+        ranked = sorted(rows, key=lambda row: (
+            bool(mentioned) and not set(mentioned) & set(row[3].split('/')),
+            abs(CEFR_LEVELS.index(row[1]) - 2.5), float(row[2]), row[0]
+        ))
+        if 'Once you have selected these words' in prompt:
+            n, k = map(int, re.search(r'select (\d+) words.*?generate exactly (\d+) questions', prompt, re.S).groups())
+            words = [row[0] for row in ranked[:n]]
+            questions = [{'word': words[i % len(words)], 'question': f"What does the word '{words[i % len(words)]}' mean?"}
+                         for i in range(k)] if words else []
+            content = json.dumps({'words': words, 'questions': {'short-answer': questions}}, indent=4)
+        else:
+            m = int(re.search(r'select up to (\d+) words', prompt).group(1))
+            content = '\n'.join(row[0] for row in ranked[:m])
+        time.sleep(PREFILL_LATENCY * len(prompt) / 4 + DECODE_LATENCY * len(content) / 4)
+        return content
+
+
+def vocab_table():
+    # What baseline.py sends
+    from exams import exam_names
+    from vectordb import MASTERED_RATING
+    import score_word_list
+    vocab = score_word_list.load_word_columns()
+    unmastered = vocab['understanding_rating'] < MASTERED_RATING
+    vocab = {key: column[unmastered] for key, column in vocab.items()}
+    exams = ['/'.join(exam_names(mask)) or 'none' for mask in vocab['exams'].tolist()]
+    return list(zip(*(vocab[key].tolist() for key in ['word', 'CEFR', 'understanding_rating']), exams))
+
+
+def evaluate(name, agent, query, table):
+    import score_word_list
+    scores = []
+    latencies = []
+    for user_input, keywords, exam in GOALS:
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = query(table, user_input, n=NUM_WORDS, k=NUM_QUESTIONS)
+        latencies.append(time.perf_counter() - start)
+        with redirect_stdout(io.StringIO()):
+            scores.append(score_word_list.score(result['words'], keywords, exam))
+    usage = agent.usage_stats()
+    print(f'{name:>8} {np.mean(scores):>8.3f} {np.mean(latencies):>12.2f} {usage["calls"] / len(GOALS):>6.1f} '
+          f'{usage["prompt_tokens"] // len(GOALS):>14}')
+
+
+def benchmark(mock):
+    if mock:
+        start_mock_server(MockBaseLineHandler)
+
+    from agent.baselineagent import BaseLineAgent
+    table = vocab_table()
+    print(f'{len(GOALS)} goals, {len(table)} words, {NUM_WORDS} words and {NUM_QUESTIONS} questions each'
+          f'{" (mock model)" if mock else ""}')
+    print(f'{"mode":>8} {"score":>8} {"latency (s)":>12} {"calls":>6} {"prompt tokens":>14}')
+    single = BaseLineAgent(use_cache=False)
+    evaluate('single', single, single.query, table)
+    sharded = BaseLineAgent(use_cache=False)
+    evaluate('sharded', sharded, sharded.query_sharded, table)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the single-call and sharded BaseLineAgent.')
+    parser.add_argument('--mock', action='store_true', help='use a local mock model instead of the OpenAI API')
+    args = parser.parse_args()
+    benchmark(args.mock or not os.environ.get('OPENAI_API_KEY'))
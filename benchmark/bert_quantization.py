@@ -0,0 +1,68 @@
+from multiprocessing import get_context
+import numpy as np
+import pandas as pd
+import resource
+import time
+
+
+DATA_PATH = 'dataset/data.csv'
+# n_results used by the GUI (per keyword) and by vocabtrainer.py (keyword average)
+TOP_K = [10, 200]
+
+
+def encode_vocabulary(quantize, num_threads, batch_size):
+    # Runs in its own process so peak RSS is measured per model
+    from embedding.bert import BertEmbedding
+
+    words = pd.read_csv(DATA_PATH)['word'].tolist()
+    emb = BertEmbedding(cache_path=None, quantize=quantize, num_threads=num_threads)
+    emb.encode_many(words[:batch_size], batch_size=batch_size)  # warm up
+
+    start = time.perf_counter()
+    vectors = emb.encode_many(words, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return vectors, elapsed, peak_rss
+
+
+def nearest_neighbours(vectors, k, chunk_size=512):
+    # Squared L2 distance, the default space of the chromadb collection
+    sq_norms = np.einsum('ij,ij->i', vectors, vectors)
+    neighbours = np.empty((len(vectors), k), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        queries = vectors[start:start + chunk_size]
+        dists = sq_norms[None, :] - 2 * queries @ vectors.T
+        top = np.argpartition(dists, k, axis=1)[:, :k]
+        neighbours[start:start + len(queries)] = top
+    return neighbours
+
+
+def agreement(fp32_vectors, int8_vectors, k):
+    fp32_nn = nearest_neighbours(fp32_vectors, k)
+    int8_nn = nearest_neighbours(int8_vectors, k)
+    overlaps = [len(np.intersect1d(a, b)) / k for a, b in zip(fp32_nn, int8_nn)]
+    return np.mean(overlaps), np.min(overlaps)
+
+
+def report(num_threads=None, batch_size=32):
+    ctx = get_context('spawn')
+    results = {}
+    for name, quantize in [('fp32', False), ('int8', True)]:
+        with ctx.Pool(1) as pool:
+            results[name] = pool.apply(encode_vocabulary, (quantize, num_threads, batch_size))
+
+    num_words = len(results['fp32'][0])
+    print(f'{"model":>6} {"total (s)":>10} {"ms/word":>8} {"peak RSS (MB)":>14}')
+    for name, (_, elapsed, peak_rss) in results.items():
+        print(f'{name:>6} {elapsed:>10.2f} {elapsed / num_words * 1000:>8.2f} {peak_rss:>14.0f}')
+
+    print(f'\nNearest-neighbour agreement with fp32 over {num_words} query words:')
+    for k in TOP_K:
+        mean, worst = agreement(results['fp32'][0], results['int8'][0], k)
+        print(f'  top-{k:<4} mean overlap {mean:.3f}, worst query {worst:.3f}')
+
+
+if __name__ == '__main__':
+    report()
@@ -0,0 +1,25 @@
+from embedding.bert import BertEmbedding
+import pandas as pd
+import time
+
+
+DATA_PATH = 'dataset/data.csv'
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def benchmark(num_words=512):
+    words = pd.read_csv(DATA_PATH)['word'].tolist()[:num_words]
+    # Disable the cache so every batch size pays for the forward passes
+    emb = BertEmbedding(cache_path=None)
+    emb.encode_many(words[:8])  # warm up
+
+    print(f'{"batch size":>10} {"words/s":>10}')
+    for batch_size in BATCH_SIZES:
+        start = time.perf_counter()
+        emb.encode_many(words, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f'{batch_size:>10} {len(words) / elapsed:>10.1f}')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,55 @@
+from vectordb import VectorDB
+import numpy as np
+import tempfile
+import time
+import tracemalloc
+
+
+SIZES = [5_000, 100_000]
+CEFR_LEVELS = ['a1', 'a2', 'b1', 'b2', 'c1', 'c2']
+
+
+def rows_as_dicts(db):
+    # What score_word_list.load_word_dict built before columnar results
+    result = {}
+    for row in db.query_all():
+        result[row['word']] = {'CEFR': row['CEFR'], 'mem': row['understanding_rating'], 'exams': row['exams']}
+    return result
+
+
+def rows_as_columns(db):
+    return db.query_all(as_columns=True)
+
+
+def measure(fn, db, repeat=5):
+    fn(db)  # warm up the metadata cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(db)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+
+    tracemalloc.start()
+    result = fn(db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak / 2**20
+
+
+def benchmark(dim=50):
+    rng = np.random.default_rng(0)
+    print(f'{"rows":>8} {"result":>8} {"time (ms)":>10} {"peak (MB)":>10}')
+    for n in SIZES:
+        with tempfile.TemporaryDirectory() as directory:
+            db = VectorDB(persist_directory=directory, backend='numpy')
+            db.add_words(
+                [f'word{i}' for i in range(n)], rng.standard_normal((n, dim)).astype(np.float32),
+                rng.choice(CEFR_LEVELS, n).tolist(), rng.integers(0, 4, n).tolist()
+            )
+            for name, fn in [('dicts', rows_as_dicts), ('columns', rows_as_columns)]:
+                elapsed, peak = measure(fn, db)
+                print(f'{n:>8} {name:>8} {elapsed:>10.2f} {peak:>10.2f}')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,41 @@
+from embedding.glove import GloveEmbedding, GLOVE_FILE, convert_glove, store_is_fresh
+import time
+import torch
+
+
+def load_text(glove_file):
+    # The original start-up path: parse the text file into one tensor per word
+    embeddings = {}
+    with open(glove_file, 'r', encoding='utf8') as f:
+        for line in f:
+            values = line.strip().split()
+            embeddings[values[0]] = torch.tensor([float(x) for x in values[1:]], dtype=torch.float)
+    return embeddings
+
+
+def benchmark(glove_file=GLOVE_FILE, repeat=3):
+    if not store_is_fresh(glove_file):
+        start = time.perf_counter()
+        convert_glove(glove_file)
+        print(f'One-time conversion: {time.perf_counter() - start:.2f}s')
+
+    text_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load_text(glove_file)
+        text_times.append(time.perf_counter() - start)
+
+    store_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        emb = GloveEmbedding(glove_file)
+        emb.encode('hello')
+        store_times.append(time.perf_counter() - start)
+
+    print(f'Text file:    {min(text_times) * 1000:10.1f} ms (best of {repeat})')
+    print(f'Binary store: {min(store_times) * 1000:10.1f} ms (best of {repeat})')
+    print(f'Speed-up:     {min(text_times) / min(store_times):10.1f}x')
+
+
+if __name__ == '__main__':
+    benchmark()
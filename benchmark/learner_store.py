@@ -0,0 +1,38 @@
+from learnerstore import LearnerStore
+import numpy as np
+import os
+import tempfile
+import time
+
+
+def benchmark(num_users=10_000, words_per_user=50, vocab_size=5_000, quiz_size=10, num_sessions=1_000):
+    rng = np.random.default_rng(0)
+    vocab = [f'word{i}' for i in range(vocab_size)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = LearnerStore(os.path.join(directory, 'learners.sqlite'))
+
+        start = time.perf_counter()
+        for user in range(num_users):
+            words = rng.choice(vocab, words_per_user, replace=False)
+            store.update_ratings(str(user), dict(zip(words, rng.random(words_per_user))))
+        fill = time.perf_counter() - start
+        print(f'Filled {num_users} users x {words_per_user} ratings in {fill:.1f}s')
+
+        users = rng.integers(num_users, size=num_sessions).astype(str)
+        start = time.perf_counter()
+        for user in users:
+            store.mastered_words(user, 0.5)
+            store.get_ratings(user, rng.choice(vocab, 200, replace=False).tolist())
+        read = (time.perf_counter() - start) / num_sessions * 1000
+
+        start = time.perf_counter()
+        for user in users:
+            words = rng.choice(vocab, quiz_size, replace=False)
+            store.update_ratings(user, dict(zip(words, rng.random(quiz_size))))
+        write = (time.perf_counter() - start) / num_sessions * 1000
+
+        print(f'Per session: candidate filter read {read:.2f} ms, quiz rating write {write:.2f} ms')
+
+
+if __name__ == '__main__':
+    benchmark()
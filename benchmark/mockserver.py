@@ -0,0 +1,95 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+
+
+class MockCompletionHandler(BaseHTTPRequestHandler):
+    """
+    Chat completions endpoint of a mock model, answering like the OpenAI API.
+
+    Subclasses implement reply, and reply_chunks to stream the reply in more than one chunk.
+    Token counts are estimated at 4 characters per token.
+    """
+    def reply(self, request) -> str:
+        """
+        :param request: The chat completion request.
+        :return: Content of the response, once the mock model has written it.
+        """
+        raise NotImplementedError
+
+    def reply_chunks(self, request):
+        """
+        :return: Generator of the content chunks of a streamed response, each yielded once written.
+        """
+        yield self.reply(request)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = request['messages'][-1]['content']
+        response = {'id': 'mock', 'created': int(time.time()), 'model': request['model']}
+        if not request.get('stream'):
+            content = self.reply(request)
+            self.send_json({
+                **response, 'object': 'chat.completion', 'usage': usage(prompt, content),
+                'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}]
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        content = ''
+        for chunk in self.reply_chunks(request):
+            content += chunk
+            self.send_event({
+                **response, 'object': 'chat.completion.chunk',
+                'choices': [{'index': 0, 'finish_reason': None, 'delta': {'content': chunk}}]
+            })
+        if request.get('stream_options', {}).get('include_usage'):
+            # Sent in a last chunk without choices
+            self.send_event({**response, 'object': 'chat.completion.chunk', 'choices': [],
+                             'usage': usage(prompt, content)})
+        self.wfile.write(b'data: [DONE]\n\n')
+
+    def send_json(self, response):
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_event(self, event):
+        self.wfile.write(f'data: {json.dumps(event)}\n\n'.encode())
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def usage(prompt, content):
+    return {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+            'total_tokens': (len(prompt) + len(content)) // 4}
+
+
+class MockServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 would queue concurrent connections
+    request_queue_size = 64
+
+
+def start_mock_server(handler):
+    """
+    Serve a mock model on a free local port, and point the OpenAI clients created afterwards at it.
+
+    Agents talking to it are created with use_cache=False, so every request reaches the mock.
+
+    :param handler: MockCompletionHandler subclass answering the requests.
+    :return: The server, stopped with server.shutdown().
+    """
+    server = MockServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['OPENAI_BASE_URL'] = f'http://127.0.0.1:{server.server_port}/v1'
+    os.environ['OPENAI_API_KEY'] = 'mock'
+    return server
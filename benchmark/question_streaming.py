@@ -0,0 +1,79 @@
+from benchmark.mockserver import MockCompletionHandler, start_mock_server
+import json
+import time
+
+
+# The mock model writes CHUNK_SIZE characters every CHUNK_LATENCY seconds
+CHUNK_SIZE = 4
+CHUNK_LATENCY = 0.005
+NUM_QUESTIONS = 20
+
+
+def make_questions(n):
+    questions = {'multiple-choice': [], 'matching': [], 'short-answer': [], 'scenario-based': []}
+    for i in range(n):
+        word = f'word{i}'
+        if i % 4 == 0:
+            questions['multiple-choice'].append({
+                'word': word, 'question': f"Which word best matches the definition of '{word}'?",
+                'choices': [word, 'other', 'another', 'none'], 'correct_answer': 'A'
+            })
+        elif i % 4 == 1:
+            questions['matching'].append({
+                'words': [word, f'{word}b', f'{word}c'],
+                'definitions': ['first definition', 'second definition', 'third definition'],
+                'correct_matches': {'1': 'A', '2': 'B', '3': 'C'}
+            })
+        elif i % 4 == 2:
+            questions['short-answer'].append({'word': word, 'question': f"What does the word '{word}' mean?"})
+        else:
+            questions['scenario-based'].append({
+                'word': word, 'question': 'I ate an ____.',
+                'choices': ['car', word, 'charger', 'crate'], 'correct_answer': 'B'
+            })
+    return json.dumps(questions, indent=4)
+
+
+class MockStreamingHandler(MockCompletionHandler):
+    """
+    Generates the same questions for every request, streamed or in one response once all are written.
+    """
+    content = make_questions(NUM_QUESTIONS)
+
+    def reply(self, request):
+        # Without streaming, the response is sent once every chunk is written
+        return ''.join(self.reply_chunks(request))
+
+    def reply_chunks(self, request):
+        for i in range(0, len(self.content), CHUNK_SIZE):
+            time.sleep(CHUNK_LATENCY)
+            yield self.content[i:i + CHUNK_SIZE]
+
+
+def benchmark():
+    server = start_mock_server(MockStreamingHandler)
+
+    from agent.questionagent import QuestionAgent
+    agent = QuestionAgent()
+    words = [f'word{i}' for i in range(10)]
+
+    start = time.perf_counter()
+    agent.query(words, num_questions=NUM_QUESTIONS)
+    blocking = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in agent.query_stream(words, num_questions=NUM_QUESTIONS):
+        first = first or time.perf_counter() - start
+        count += 1
+    streamed = time.perf_counter() - start
+
+    print(f'{NUM_QUESTIONS} questions, {len(MockStreamingHandler.content)} characters')
+    print(f'query:        first question after {blocking:5.2f} s, all after {blocking:5.2f} s')
+    print(f'query_stream: first question after {first:5.2f} s, all ({count}) after {streamed:5.2f} s')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    benchmark()
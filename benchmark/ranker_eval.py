@@ -0,0 +1,66 @@
+from contextlib import redirect_stdout
+from embedding.glove import GloveEmbedding
+from ranker import create_ranker
+from vectordb import MASTERED_RATING
+import io
+import numpy as np
+import os
+import score_word_list
+import time
+
+
+NUM_WORDS = 10
+NUM_CANDIDATES = 200
+GOALS = [
+    (['equation', 'integral', 'calculate', 'formula', 'angle'], None),
+    (['travel', 'airport', 'hotel', 'passport', 'journey'], 'IELTS'),
+    (['economy', 'market', 'inflation', 'trade', 'investment'], 'IELTS'),
+    (['argument', 'evidence', 'theory', 'hypothesis', 'analysis'], 'GRE'),
+    (['health', 'disease', 'medicine', 'doctor', 'hospital'], None),
+]
+
+
+def candidates(db, embedding, keywords, exam):
+    # What VocabTrainer.run hands to the ranker
+    vectors, mask = embedding.encode_many(keywords)
+    table = db.query_by_similarity_many(
+        vectors[mask], n_results=NUM_CANDIDATES, fusion="centroid", exam=exam, max_rating=MASTERED_RATING
+    )
+    # score_word_list.score cannot rate words without a GloVe vector, e.g. 'ice cream'
+    return [(row['word'], row['CEFR'], row['understanding_rating']) for row in table if row['word'] in embedding.index]
+
+
+def evaluate(name, select, goals):
+    scores = []
+    latencies = []
+    for keywords, exam, vocab_table in goals:
+        start = time.perf_counter()
+        words = select(vocab_table, keywords, exam)
+        latencies.append(time.perf_counter() - start)
+        with redirect_stdout(io.StringIO()):
+            scores.append(score_word_list.score(words, keywords, exam))
+    print(f'{name:>10} {np.mean(scores):>8.3f} {np.min(scores):>8.3f} {np.mean(latencies) * 1000:>12.2f}')
+
+
+def benchmark():
+    db = score_word_list.get_db()
+    embedding = GloveEmbedding()
+    goals = [(keywords, exam, candidates(db, embedding, keywords, exam)) for keywords, exam in GOALS]
+    print(f'{len(goals)} goals, {np.mean([len(goal[2]) for goal in goals]):.0f} candidates each, {NUM_WORDS} words')
+    print(f'{"ranker":>10} {"score":>8} {"worst":>8} {"latency (ms)":>12}')
+
+    # Reference: the words closest to the keywords
+    evaluate('nearest', lambda table, keywords, exam: [row[0] for row in table[:NUM_WORDS]], goals)
+    local = create_ranker('local', embedding, db)
+    evaluate('local', lambda table, keywords, exam: local.query(table, NUM_WORDS, keywords, exam), goals)
+    if os.environ.get('OPENAI_API_KEY'):
+        from agent.rankingagent import RankingAgent
+        # Every goal has to reach the endpoint
+        llm = RankingAgent(use_cache=False)
+        evaluate('llm', lambda table, keywords, exam: llm.query(table, NUM_WORDS, keywords, exam), goals)
+    else:
+        print('OPENAI_API_KEY is not set, skipping the LLM ranker.')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,36 @@
+from vectordb import VectorDB
+from embedding.glove import GloveEmbedding
+import pandas as pd
+import tempfile
+import time
+
+
+DATA_PATH = 'dataset/data.csv'
+
+
+def benchmark():
+    df = pd.read_csv(DATA_PATH)
+    words = df['word'].tolist()
+    cefr = df['level'].tolist()
+    exams = df['exams'].tolist()
+    vecs, _ = GloveEmbedding().encode_many(words)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = VectorDB(persist_directory=directory)
+        start = time.perf_counter()
+        for i in range(len(words)):
+            db.add_word(words[i], vecs[i].tolist(), cefr[i], exams[i])
+        row_by_row = len(words) / (time.perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = VectorDB(persist_directory=directory)
+        start = time.perf_counter()
+        db.add_words(words, vecs, cefr, exams)
+        bulk = len(words) / (time.perf_counter() - start)
+
+    print(f'add_word loop: {row_by_row:10.0f} rows/s')
+    print(f'add_words:     {bulk:10.0f} rows/s')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,60 @@
+import os
+
+
+# Storage and similarity search backend of VectorDB: 'chroma' or 'numpy'
+DB_BACKEND = os.environ.get('VOCABTRAINER_DB_BACKEND', 'chroma')
+
+# Directory the backend persists to, defaults to ./chromadb or ./numpydb
+DB_PATH = os.environ.get('VOCABTRAINER_DB_PATH')
+
+# VectorDB flushes buffered rating changes once this many are pending...
+CACHE_FLUSH_SIZE = int(os.environ.get('VOCABTRAINER_CACHE_FLUSH_SIZE', 256))
+# ...or this many seconds after the last flush
+CACHE_FLUSH_INTERVAL = float(os.environ.get('VOCABTRAINER_CACHE_FLUSH_INTERVAL', 30))
+
+# SQLite database holding per-learner ratings, which VectorDB reads and writes for calls given a user_id
+LEARNER_DB_PATH = os.environ.get('VOCABTRAINER_LEARNER_DB_PATH', 'learners.sqlite')
+
+# Maximum number of quiz answers graded concurrently
+GRADING_CONCURRENCY = int(os.environ.get('VOCABTRAINER_GRADING_CONCURRENCY', 8))
+# How quiz answers are graded: 'batch' sends the whole quiz in one request,
+# 'concurrent' sends one request per answer in parallel
+GRADING_MODE = os.environ.get('VOCABTRAINER_GRADING_MODE', 'batch')
+
+# Whether agents reuse stored responses to identical prompts; agents can opt out individually
+RESPONSE_CACHE = os.environ.get('VOCABTRAINER_RESPONSE_CACHE', '1') == '1'
+# SQLite database holding cached agent responses
+RESPONSE_CACHE_PATH = os.environ.get('VOCABTRAINER_RESPONSE_CACHE_PATH', 'responses.sqlite')
+# Least recently used responses are evicted beyond this total size...
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('VOCABTRAINER_RESPONSE_CACHE_MAX_BYTES', 64 * 2**20))
+# ...and responses expire after this many seconds
+RESPONSE_CACHE_TTL = float(os.environ.get('VOCABTRAINER_RESPONSE_CACHE_TTL', 7 * 24 * 3600))
+
+# SQLite database holding pre-generated questions
+QUESTION_BANK_PATH = os.environ.get('VOCABTRAINER_QUESTION_BANK_PATH', 'questions.sqlite')
+# Words with fewer questions that have not been served yet are refilled in the background
+QUESTION_BANK_MIN_STOCK = int(os.environ.get('VOCABTRAINER_QUESTION_BANK_MIN_STOCK', 2))
+# Number of words per question generation request when filling the bank
+QUESTION_BANK_BATCH_SIZE = int(os.environ.get('VOCABTRAINER_QUESTION_BANK_BATCH_SIZE', 10))
+
+# Number of next sessions planned concurrently in the background
+PREFETCH_WORKERS = int(os.environ.get('VOCABTRAINER_PREFETCH_WORKERS', 2))
+# A prefetched session is discarded once the Jaccard similarity of its candidate words
+# and the actual ones falls below this
+PREFETCH_MIN_OVERLAP = float(os.environ.get('VOCABTRAINER_PREFETCH_MIN_OVERLAP', 0.5))
+
+# Ranker selecting the words of a session: 'llm' asks the RankingAgent, 'local' scores them with NumPy
+RANKER = os.environ.get('VOCABTRAINER_RANKER', 'llm')
+# How strongly the local ranker penalizes words similar to ones already selected, between 0 and 1
+RANKER_DIVERSITY = float(os.environ.get('VOCABTRAINER_RANKER_DIVERSITY', 0.3))
+
+# Maximum prompt tokens of the agents that send vocabulary tables, 0 for no limit; rows are dropped to fit
+RANKING_PROMPT_BUDGET = int(os.environ.get('VOCABTRAINER_RANKING_PROMPT_BUDGET', 4000))
+BASELINE_PROMPT_BUDGET = int(os.environ.get('VOCABTRAINER_BASELINE_PROMPT_BUDGET', 16000))
+
+# How baseline.py selects words: 'single' sends the whole vocabulary in one request,
+# 'sharded' has shards of it nominate candidates concurrently before a final request over those
+BASELINE_MODE = os.environ.get('VOCABTRAINER_BASELINE_MODE', 'single')
+# Number of words per shard, and maximum number of shard requests in flight
+BASELINE_SHARD_SIZE = int(os.environ.get('VOCABTRAINER_BASELINE_SHARD_SIZE', 500))
+BASELINE_SHARD_CONCURRENCY = int(os.environ.get('VOCABTRAINER_BASELINE_SHARD_CONCURRENCY', 8))
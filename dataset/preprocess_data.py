@@ -1,14 +1,39 @@
+import os
+import sys
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from exams import register_exams
 
-base = pd.read_csv('base/base.csv')
-ielts = pd.read_csv('ielts/ielts.csv')
-gre = pd.read_csv('gre/gre.csv')
 
-ielts_set = set(ielts['word'])
-gre_set = set(gre['word'])
+DATASET_DIR = os.path.dirname(os.path.abspath(__file__))
 
-base['ielts'] = base['word'].apply(lambda x: 1 if x in ielts_set else 0)
-base['gre'] = base['word'].apply(lambda x: 1 if x in gre_set else 0)
 
-base.to_csv('data.csv', index=False)
\ No newline at end of file
+def exam_lists():
+    """
+    Find the exam word lists, each at dataset/<exam>/<exam>.csv with a "word" column.
+
+    :return: Dictionary from directory name to the path of its word list.
+    """
+    lists = {}
+    for name in sorted(os.listdir(DATASET_DIR)):
+        path = os.path.join(DATASET_DIR, name, name + '.csv')
+        if name != 'base' and os.path.isfile(path):
+            lists[name] = path
+    return lists
+
+
+lists = exam_lists()
+registry = register_exams([name.upper() for name in lists])
+columns = sorted(lists, key=lambda name: registry[name.upper()])
+
+base = pd.read_csv(os.path.join(DATASET_DIR, 'base', 'base.csv'))
+members = pd.concat([pd.read_csv(path, usecols=['word']).assign(exam=name) for name, path in lists.items()], ignore_index=True)
+# One 0/1 column per exam, and the exam bits of every listed word
+flags = pd.crosstab(members['word'], members['exam']).clip(upper=1).reindex(columns=columns, fill_value=0)
+flags['exams'] = flags.to_numpy() @ [1 << registry[name.upper()] for name in columns]
+
+base = base.join(flags, on='word')
+base[flags.columns] = base[flags.columns].fillna(0).astype(int)
+
+base.to_csv(os.path.join(DATASET_DIR, 'data.csv'), index=False)
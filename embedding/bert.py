@@ -1,17 +1,70 @@
 from transformers import BertTokenizer, BertModel
+from embedding.cache import EmbeddingCache
+import numpy as np
 import torch
 
 
+MODEL_NAME = 'bert-base-uncased'
+CACHE_PATH = 'bert_cache.sqlite'
+
+
 class BertEmbedding():
-    def __init__(self):
-        self.tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-        self.model = BertModel.from_pretrained('bert-base-uncased')
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    def __init__(self, model_name=MODEL_NAME, cache_path=CACHE_PATH, quantize=False, num_threads=None):
+        """
+        :param model_name: Name or path of the pretrained BERT model.
+        :param cache_path: Path of the on-disk embedding cache, None to disable caching.
+        :param quantize: Run the model on CPU with int8 dynamically-quantized linear layers.
+        :param num_threads: Number of intra-op threads used by torch, None to keep the default.
+        """
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        self.tokenizer = BertTokenizer.from_pretrained(model_name)
+        self.model = BertModel.from_pretrained(model_name)
+        self.model.eval()
+        if quantize:
+            # Quantized kernels are CPU only
+            self.device = torch.device('cpu')
+            self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.model.to(self.device)
-    
+        # Quantized embeddings differ from fp32 ones, so they are cached separately
+        self.model_name = model_name + (':int8' if quantize else '')
+        self.version = self.model_name
+        self.dim = self.model.config.hidden_size
+        self.cache = EmbeddingCache(cache_path) if cache_path else None
+
     def encode(self, text):
-        inputs = self.tokenizer(text, return_tensors='pt', truncation=True, padding=True).to(self.device)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        cls_embedding = outputs.last_hidden_state[:, 0, :].squeeze().cpu().numpy()
-        return cls_embedding.flatten().tolist()
+        return self.encode_many([text])[0].tolist()
+
+    def encode_many(self, texts, batch_size=32):
+        """
+        Encode a batch of texts into their [CLS] embeddings.
+
+        Cached texts are not re-encoded. The remaining texts are sorted by token
+        length and run in batches, so each batch is only padded to its longest text.
+
+        :param texts: List of texts.
+        :param batch_size: Number of texts per forward pass.
+        :return: float32 array of shape (n, dim).
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        found = self.cache.get_many(self.model_name, unique_texts) if self.cache else {}
+        missing = [text for text in unique_texts if text not in found]
+
+        if missing:
+            lengths = [len(ids) for ids in self.tokenizer(missing, truncation=True)['input_ids']]
+            order = np.argsort(lengths, kind='stable')
+            sorted_texts = [missing[i] for i in order]
+            vectors = np.empty((len(sorted_texts), self.dim), dtype=np.float32)
+            with torch.inference_mode():
+                for start in range(0, len(sorted_texts), batch_size):
+                    batch = sorted_texts[start:start + batch_size]
+                    inputs = self.tokenizer(batch, return_tensors='pt', truncation=True, padding=True).to(self.device)
+                    outputs = self.model(**inputs)
+                    vectors[start:start + len(batch)] = outputs.last_hidden_state[:, 0, :].float().cpu().numpy()
+            found.update(zip(sorted_texts, vectors))
+            if self.cache:
+                self.cache.put_many(self.model_name, sorted_texts, vectors)
+
+        return np.stack([found[text] for text in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
@@ -0,0 +1,44 @@
+from sqlitestore import connect, select_in_chunks
+import numpy as np
+
+
+class EmbeddingCache():
+    """
+    Persistent on-disk cache of embeddings keyed by (model name, text).
+    """
+    def __init__(self, path):
+        self.conn = connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings ('
+            'model TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, '
+            'PRIMARY KEY (model, text))'
+        )
+        self.conn.commit()
+
+    def get_many(self, model, texts):
+        """
+        Look up cached embeddings.
+
+        :param model: Model name the embeddings were computed with.
+        :param texts: List of texts.
+        :return: Dictionary from text to float32 vector, for the texts found in the cache.
+        """
+        rows = select_in_chunks(
+            self.conn, 'SELECT text, vector FROM embeddings WHERE model = ? AND text IN ({placeholders})', texts, [model]
+        )
+        return {text: np.frombuffer(vector, dtype=np.float32) for text, vector in rows}
+
+    def put_many(self, model, texts, vectors):
+        """
+        Store embeddings in the cache.
+
+        :param model: Model name the embeddings were computed with.
+        :param texts: List of texts.
+        :param vectors: Array of shape (n, dim) with one embedding per text.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO embeddings (model, text, vector) VALUES (?, ?, ?)',
+            [(model, text, vector.tobytes()) for text, vector in zip(texts, vectors)]
+        )
+        self.conn.commit()
@@ -1,25 +1,120 @@
-import torch
+import json
+import os
+import numpy as np
+
+
+GLOVE_FILE = 'glove.6B.50d.txt'
+
+
+def store_paths(glove_file):
+    """
+    Paths of the binary store generated next to a GloVe text file.
+
+    :param glove_file: Path to the GloVe text file.
+    :return: Tuple of (matrix .npy path, vocabulary path, metadata path).
+    """
+    prefix = os.path.splitext(glove_file)[0]
+    return prefix + '.npy', prefix + '.vocab', prefix + '.meta.json'
+
+
+def source_signature(glove_file):
+    stat = os.stat(glove_file)
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+
+def convert_glove(glove_file=GLOVE_FILE):
+    """
+    Convert a GloVe text file into a binary store, only needs to be executed once.
+
+    The store is a contiguous float32 matrix (.npy), a vocabulary file with one
+    word per line (the line number is the row in the matrix), and a small JSON
+    file recording the source it was built from, so stale stores can be detected.
+
+    :param glove_file: Path to the GloVe text file.
+    :return: Tuple of (words, matrix).
+    """
+    matrix_path, vocab_path, meta_path = store_paths(glove_file)
+    words = []
+    rows = []
+    with open(glove_file, 'r', encoding='utf8') as f:
+        for line in f:
+            word, _, values = line.rstrip().partition(' ')
+            words.append(word)
+            rows.append(values)
+    matrix = np.loadtxt(rows, dtype=np.float32, ndmin=2)
+
+    np.save(matrix_path, matrix)
+    with open(vocab_path, 'w', encoding='utf8') as f:
+        f.write('\n'.join(words))
+    with open(meta_path, 'w') as f:
+        json.dump(dict(source_signature(glove_file), rows=len(words), dim=matrix.shape[1]), f)
+    return words, matrix
+
+
+def store_is_fresh(glove_file):
+    matrix_path, vocab_path, meta_path = store_paths(glove_file)
+    if not (os.path.exists(matrix_path) and os.path.exists(vocab_path) and os.path.exists(meta_path)):
+        return False
+    if not os.path.exists(glove_file):
+        # Deployments may ship the binary store only
+        return True
+    with open(meta_path) as f:
+        meta = json.load(f)
+    signature = source_signature(glove_file)
+    return all(meta.get(key) == value for key, value in signature.items())
+
 
 class GloveEmbedding():
-    def __init__(self):
-        glove_file = 'glove.6B.50d.txt'
-        self.embeddings = {}
-        with open(glove_file, 'r', encoding='utf8') as f:
-            for line in f:
-                values = line.strip().split()
-                word = values[0]
-                vector = torch.tensor([float(x) for x in values[1:]], dtype=torch.float)
-                self.embeddings[word] = vector
-        self.dim = len(next(iter(self.embeddings.values())))
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    def __init__(self, glove_file=GLOVE_FILE):
+        matrix_path, vocab_path, _ = store_paths(glove_file)
+        if store_is_fresh(glove_file):
+            self.vectors = np.load(matrix_path, mmap_mode='r')
+            with open(vocab_path, 'r', encoding='utf8') as f:
+                words = f.read().split('\n')
+        else:
+            print(f"Binary store for {glove_file} is missing or stale, converting the text file.")
+            words, self.vectors = convert_glove(glove_file)
+        self.index = {word: i for i, word in enumerate(words)}
+        self.dim = self.vectors.shape[1]
+        self.version = os.path.splitext(os.path.basename(glove_file))[0]
 
     def contains(self, word):
-        return word in self.embeddings
+        return word in self.index
 
     def encode(self, word):
         word = word.lower()
         if self.contains(word):
-            embedding = self.embeddings[word].to(self.device)
+            embedding = np.asarray(self.vectors[self.index[word]])
         else:
-            embedding = torch.zeros(self.dim).to(self.device)
-        return embedding.cpu().numpy().tolist()
+            embedding = np.zeros(self.dim, dtype=np.float32)
+        return embedding.tolist()
+
+    def rows(self, words):
+        return np.fromiter((self.index.get(word.lower(), -1) for word in words), dtype=np.int64, count=len(words))
+
+    def contains_many(self, words):
+        """
+        Check a batch of words against the vocabulary.
+
+        :param words: List of words.
+        :return: Boolean array of shape (n,), True where the word has an embedding.
+        """
+        return self.rows(words) >= 0
+
+    def encode_many(self, words):
+        """
+        Encode a batch of words with a single gather from the embedding matrix.
+
+        :param words: List of words.
+        :return: Tuple of (float32 array of shape (n, dim), boolean mask of shape (n,)).
+                 Rows of out-of-vocabulary words are zero and False in the mask.
+        """
+        rows = self.rows(words)
+        mask = rows >= 0
+        embeddings = np.zeros((len(words), self.dim), dtype=np.float32)
+        embeddings[mask] = self.vectors[rows[mask]]
+        return embeddings, mask
+
+
+if __name__ == '__main__':
+    convert_glove()
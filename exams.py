@@ -0,0 +1,108 @@
+from collections.abc import Iterable
+import json
+import numbers
+import os
+import re
+
+
+# Registry of exam word lists: exam name -> bit of the membership mask stored with each word
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dataset', 'exams.json')
+# Masks are stored as signed 64-bit integers
+MAX_EXAMS = 63
+
+
+def load_registry(path=REGISTRY_PATH):
+    """
+    :param path: Path of the registry file.
+    :return: Dictionary from exam name to its bit, empty if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf8') as f:
+        return json.load(f)
+
+
+def register_exams(names, path=REGISTRY_PATH):
+    """
+    Give new exams the next free bits and persist the registry. Bits of known exams never change,
+    so masks already stored in the database stay valid.
+
+    :param names: Exam names.
+    :return: The updated registry.
+    """
+    registry = load_registry(path)
+    known = {normalize(name) for name in registry}
+    for name in names:
+        if normalize(name) in known:
+            continue
+        if len(registry) >= MAX_EXAMS:
+            raise ValueError(f"At most {MAX_EXAMS} exams can be registered.")
+        registry[name] = max(registry.values(), default=-1) + 1
+        known.add(normalize(name))
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(registry, f, indent=4)
+    if os.path.abspath(path) == REGISTRY_PATH:
+        EXAM_BITS.clear()
+        EXAM_BITS.update(registry)
+        EXAMS[:] = list(registry)
+    return registry
+
+
+def normalize(name):
+    # 'cet-6', 'CET 6' and 'CET6' name the same exam
+    return re.sub(r'[^A-Z0-9]', '', str(name).upper())
+
+
+EXAM_BITS = load_registry()
+EXAMS = list(EXAM_BITS)
+
+
+def find_exam(name):
+    """
+    Look up an exam by name, ignoring case and punctuation.
+
+    :param name: Exam name, e.g. as extracted from the learner's goal.
+    :return: The registered exam name, or None if the exam is unknown.
+    """
+    if name is None:
+        return None
+    key = normalize(name)
+    for exam in EXAMS:
+        if normalize(exam) == key:
+            return exam
+    return None
+
+
+def exam_mask(exams):
+    """
+    :param exams: An exam name, a list of exam names, or a mask (returned as an int), e.g. a NumPy integer.
+    :return: Integer with the bits of the exams set.
+    """
+    if isinstance(exams, numbers.Integral):
+        return int(exams)
+    if isinstance(exams, str):
+        exams = [exams]
+    elif not isinstance(exams, Iterable):
+        raise TypeError(f"Exams must be a name, a list of names or an integer mask, not {type(exams).__name__}.")
+    mask = 0
+    for name in exams:
+        exam = find_exam(name)
+        if exam is None:
+            raise ValueError(f"Unknown exam '{name}', must be one of {EXAMS}.")
+        mask |= 1 << EXAM_BITS[exam]
+    return mask
+
+
+def exam_names(mask):
+    """
+    :param mask: Integer exam membership mask.
+    :return: List of the names of the exams whose bits are set.
+    """
+    return [exam for exam in EXAMS if int(mask) >> EXAM_BITS[exam] & 1]
+
+
+def bit_width():
+    """
+    :return: Number of bits in use, masks are below 2 ** bit_width().
+    """
+    return max(EXAM_BITS.values(), default=-1) + 1
@@ -0,0 +1,24 @@
+import atexit
+import weakref
+
+
+# Objects flushed at exit, with the name of their flush method; held weakly so they can still be collected
+_registered = weakref.WeakKeyDictionary()
+
+
+@atexit.register
+def _flush_registered():
+    for obj, method in list(_registered.items()):
+        getattr(obj, method)()
+
+
+def register_flush_on_exit(obj, method='flush'):
+    """
+    Call a method of an object when the process exits, unless the object was collected before.
+
+    Objects collected earlier flush in their own __del__.
+
+    :param obj: Object holding buffered writes.
+    :param method: Name of the method writing them out.
+    """
+    _registered[obj] = method
@@ -0,0 +1,51 @@
+import re
+
+
+# Question types with a single correct answer, scored 0 or 1 without asking the LLM
+OBJECTIVE_TYPES = ['multiple-choice', 'scenario-based', 'matching']
+
+
+def can_grade(question_type, question):
+    """
+    :return: Whether the question is objective and carries its answer key.
+    """
+    if question_type == 'matching':
+        return isinstance(question.get('correct_matches'), dict)
+    return question_type in OBJECTIVE_TYPES and isinstance(question.get('correct_answer'), str)
+
+
+def choice_letter(question, answer):
+    """
+    Normalize an answer to a multiple-choice or scenario-based question to its letter,
+    accepting the letter in any case or the text of the choice.
+    """
+    answer = str(answer).strip()
+    choices = question.get('choices', [])
+    if answer in choices:
+        return chr(choices.index(answer) + ord('A'))
+    return answer[:1].upper()
+
+
+def grade(question_type, question, user_answer) -> dict:
+    """
+    Score an answer to an objective question against its answer key.
+
+    :param question_type: 'multiple-choice', 'scenario-based' or 'matching'.
+    :param question: The question, with its "correct_answer" or "correct_matches".
+    :param user_answer: The chosen letter (or choice), or matches in the format "1-B, 2-C, 3-A".
+    :return: Map from each word of the question to 1 if answered correctly, otherwise 0,
+             in the format returned by AnalyzerAgent.
+    """
+    if not can_grade(question_type, question):
+        raise ValueError(f"Cannot grade a {question_type} question without its answer key.")
+
+    if question_type == 'matching':
+        given = {number: letter.upper() for number, letter in re.findall(r'(\d+)\s*-\s*([A-Za-z])', str(user_answer))}
+        correct = {str(number): str(letter).strip()[:1].upper() for number, letter in question['correct_matches'].items()}
+        return {
+            word: int(str(j + 1) in correct and given.get(str(j + 1)) == correct[str(j + 1)])
+            for j, word in enumerate(question['words'])
+        }
+
+    correct = choice_letter(question, question['correct_answer'])
+    return {question['word']: int(choice_letter(question, user_answer) == correct)}
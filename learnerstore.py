@@ -0,0 +1,66 @@
+from sqlitestore import connect, select_in_chunks
+import config
+import threading
+import time
+
+
+class LearnerStore:
+    """
+    Per-learner understanding ratings keyed by (user_id, word), kept apart from the word collection.
+
+    Words a learner has never been rated on have a rating of 0.
+    """
+    def __init__(self, path=config.LEARNER_DB_PATH):
+        """
+        :param path: Path of the SQLite database.
+        """
+        self.conn = connect(path)
+        self.lock = threading.Lock()
+        # The primary key is clustered and leads with user_id, so it is also the per-user index
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS ratings ('
+            'user_id TEXT NOT NULL, word TEXT NOT NULL, rating REAL NOT NULL, updated_at REAL NOT NULL, '
+            'PRIMARY KEY (user_id, word)) WITHOUT ROWID'
+        )
+        self.conn.commit()
+
+    def get_ratings(self, user_id, words=None):
+        """
+        Read a learner's ratings.
+
+        :param user_id: Learner to read.
+        :param words: Words to read, None for every word the learner has a rating for.
+        :return: Dictionary from word to rating, only for words the learner has been rated on.
+        """
+        with self.lock:
+            if words is None:
+                return dict(self.conn.execute('SELECT word, rating FROM ratings WHERE user_id = ?', (user_id,)))
+            return dict(select_in_chunks(
+                self.conn, 'SELECT word, rating FROM ratings WHERE user_id = ? AND word IN ({placeholders})', words,
+                [user_id]
+            ))
+
+    def mastered_words(self, user_id, threshold):
+        """
+        :return: Set of words the learner is rated at or above threshold on.
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT word FROM ratings WHERE user_id = ? AND rating >= ?', (user_id, threshold))
+            return {word for word, in rows}
+
+    def update_ratings(self, user_id, ratings, k=0.6):
+        """
+        Apply new ratings to a learner with an exponential moving average, in one transaction.
+
+        :param user_id: Learner to update.
+        :param ratings: Dictionary from word to its new understanding rating.
+        :param k: Weight of the new rating in the exponential moving average.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT INTO ratings (user_id, word, rating, updated_at) VALUES (?, ?, ? * ?, ?) '
+                'ON CONFLICT (user_id, word) DO UPDATE SET '
+                'rating = excluded.rating + (1 - ?) * rating, updated_at = excluded.updated_at',
+                [(user_id, word, k, rating, now, k) for word, rating in ratings.items()]
+            )
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+import config
+import threading
+
+
+def jaccard(a, b):
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+class SessionPrefetcher:
+    """
+    Computes the next session of a learning goal in the background while the current one is answered.
+
+    A session is a dictionary with at least "candidates", the candidate words it was
+    planned from. It is only used if those are still close enough to the actual
+    candidates when the next round starts.
+    """
+    def __init__(self, max_workers=config.PREFETCH_WORKERS, min_overlap=config.PREFETCH_MIN_OVERLAP, on_take=None):
+        """
+        :param max_workers: Number of sessions planned concurrently.
+        :param min_overlap: Minimum Jaccard similarity between the planned and the actual candidate
+                            words for a prefetched session to be used.
+        :param on_take: Function called with every session that is handed out, e.g. to count its
+                        questions as served; stale sessions are dropped without calling it.
+        """
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='prefetch')
+        self.min_overlap = min_overlap
+        self.on_take = on_take
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def schedule(self, goal, plan_session):
+        """
+        Start planning the next session of a goal, replacing the one prefetched before.
+
+        :param goal: Key of the learning goal the session belongs to.
+        :param plan_session: Function returning the session, or None if there is nothing left to learn.
+        """
+        with self.lock:
+            previous = self.sessions.get(goal)
+            if previous is not None:
+                previous.cancel()
+            self.sessions[goal] = self.executor.submit(plan_session)
+
+    def is_stale(self, goal, candidates):
+        """
+        :return: Whether the prefetched session of a goal was planned from candidates that differ materially
+                 from the given ones. Sessions still being planned are not stale.
+        """
+        with self.lock:
+            future = self.sessions.get(goal)
+        if future is None or not future.done() or future.cancelled() or future.exception() is not None:
+            return False
+        session = future.result()
+        return session is not None and jaccard(session['candidates'], candidates) < self.min_overlap
+
+    def take(self, goal, candidates):
+        """
+        Remove and return the prefetched session of a goal, waiting for it if it is still being planned.
+
+        :param goal: Learning goal.
+        :param candidates: Actual candidate words of the goal.
+        :return: The session, or None if there is none, it failed, or it is stale.
+        """
+        with self.lock:
+            future = self.sessions.pop(goal, None)
+        if future is None or future.cancelled():
+            return None
+        try:
+            session = future.result()
+        except Exception as e:
+            print(f"Prefetching the next session failed: {e}")
+            return None
+        if session is None:
+            return None
+        overlap = jaccard(session['candidates'], candidates)
+        if overlap < self.min_overlap:
+            print(f"Prefetched session is stale (candidate overlap {overlap:.2f}), planning a new one.")
+            return None
+        if self.on_take is not None:
+            self.on_take(session)
+        return session
@@ -0,0 +1,333 @@
+from sqlitestore import connect, select_in_chunks
+import argparse
+import config
+import json
+import queue
+import random
+import threading
+import time
+
+
+QUESTION_TYPES = ['multiple-choice', 'matching', 'short-answer', 'scenario-based']
+# Types stored per word; matching questions are assembled from the definitions of several words
+WORD_TYPES = ['multiple-choice', 'short-answer', 'scenario-based']
+MATCHING_SIZE = 3
+
+
+def validate_question(question_type, question):
+    """
+    Check that a generated question is complete and consistent with its answer key.
+
+    :raises ValueError: If the question is malformed.
+    """
+    if not isinstance(question, dict):
+        raise ValueError("The question is not a JSON object.")
+    if question_type == 'matching':
+        words, definitions, matches = question.get('words'), question.get('definitions'), question.get('correct_matches')
+        if not (isinstance(words, list) and isinstance(definitions, list) and isinstance(matches, dict)):
+            raise ValueError("A matching question needs words, definitions and correct_matches.")
+        if len(words) != len(definitions) or not all(isinstance(value, str) for value in words + definitions):
+            raise ValueError("A matching question needs one definition per word.")
+        letters = [chr(ord('A') + i) for i in range(len(words))]
+        if sorted(matches) != sorted(str(i + 1) for i in range(len(words))) or sorted(matches.values()) != letters:
+            raise ValueError("The correct matches of a matching question must pair every word with one definition.")
+        return
+    if question_type not in WORD_TYPES:
+        raise ValueError(f"Unknown question type '{question_type}'.")
+    if not (isinstance(question.get('word'), str) and isinstance(question.get('question'), str)):
+        raise ValueError("A question needs a word and a question.")
+    if question_type == 'short-answer':
+        return
+    choices, answer = question.get('choices'), question.get('correct_answer')
+    if not (isinstance(choices, list) and len(choices) == 4 and len(set(map(str, choices))) == 4):
+        raise ValueError("A question needs four different choices.")
+    if not (isinstance(answer, str) and len(answer) == 1 and 0 <= ord(answer.upper()) - ord('A') < 4):
+        raise ValueError(f"Invalid correct answer '{answer}'.")
+    # The correct choice may be another word, e.g. for "select the word opposite in meaning to ..."
+    word = question['word'].lower()
+    if word not in question['question'].lower() and word not in [str(choice).lower() for choice in choices]:
+        raise ValueError("The word of the question appears neither in the question nor in its choices.")
+
+
+class QuestionBank:
+    """
+    Validated questions stored per word and type, so sessions are assembled without calling the LLM.
+
+    Multiple-choice, short-answer and scenario-based questions are stored as generated.
+    Matching questions are split into the definition of each word and assembled from
+    the definitions of the session's words.
+    """
+    def __init__(self, path=config.QUESTION_BANK_PATH):
+        """
+        :param path: Path of the SQLite database.
+        """
+        self.conn = connect(path)
+        self.lock = threading.Lock()
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS questions ('
+            'id INTEGER PRIMARY KEY, word TEXT NOT NULL, type TEXT NOT NULL, question TEXT NOT NULL, '
+            'served INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, UNIQUE (word, type, question))'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS questions_word ON questions (word, type, served)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS definitions (word TEXT PRIMARY KEY, definition TEXT NOT NULL) WITHOUT ROWID'
+        )
+        self.conn.commit()
+
+    def add_questions(self, questions, served=0):
+        """
+        Validate and store generated questions, skipping malformed ones.
+
+        :param questions: Dictionary from question type to a list of questions, as returned by QuestionAgent.query.
+        :param served: Number of times the questions have been served already.
+        :return: Number of questions stored.
+        """
+        rows = []
+        definitions = []
+        for question_type, items in questions.items():
+            for question in items:
+                try:
+                    validate_question(question_type, question)
+                except ValueError as e:
+                    print(f"Skipping invalid {question_type} question: {e}")
+                    continue
+                if question_type == 'matching':
+                    for j, word in enumerate(question['words']):
+                        letter = question['correct_matches'][str(j + 1)]
+                        definitions.append((word.lower(), question['definitions'][ord(letter) - ord('A')]))
+                else:
+                    rows.append((question['word'].lower(), question_type, json.dumps(question), served, time.time()))
+
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO questions (word, type, question, served, created_at) VALUES (?, ?, ?, ?, ?)', rows
+            )
+            self.conn.executemany('INSERT OR REPLACE INTO definitions (word, definition) VALUES (?, ?)', definitions)
+        return len(rows) + len(definitions)
+
+    def stock(self, words):
+        """
+        :return: Dictionary from word to its number of questions that have not been served yet, in lowercase.
+        """
+        words = [word.lower() for word in words]
+        with self.lock:
+            counts = dict(select_in_chunks(
+                self.conn, 'SELECT word, COUNT(*) FROM questions WHERE served = 0 AND word IN ({placeholders}) '
+                'GROUP BY word', words
+            ))
+        return {word: counts.get(word, 0) for word in words}
+
+    def low_stock(self, words, minimum=config.QUESTION_BANK_MIN_STOCK):
+        """
+        :return: Words with fewer than minimum questions that have not been served yet.
+        """
+        return [word for word, count in self.stock(words).items() if count < minimum]
+
+    def assemble(self, words, num_questions, mark_served=True, reserve_missing=False):
+        """
+        Assemble a quiz for the given words from the bank.
+
+        Every word gets at least one question if the bank has one, question types are
+        balanced, and the least served questions are picked first.
+
+        :param words: Words of the session, matched against the bank in lowercase.
+        :param num_questions: Number of questions wanted.
+        :param mark_served: Whether the questions count as served now, otherwise mark_served does it once they are.
+        :param reserve_missing: Leave one of the num_questions to each word without any question, for the
+                                caller to generate.
+        :return: Tuple of (questions by type in the format of QuestionAgent.query, words without any question).
+        """
+        words = list(dict.fromkeys(word.lower() for word in words))
+        with self.lock:
+            rows = select_in_chunks(
+                self.conn, 'SELECT id, word, type, question, served FROM questions WHERE word IN ({placeholders}) '
+                'ORDER BY served, RANDOM()', words
+            )
+            definitions = dict(select_in_chunks(
+                self.conn, 'SELECT word, definition FROM definitions WHERE word IN ({placeholders})', words
+            ))
+
+        available = {word: {} for word in words}
+        for question_id, word, question_type, question, served in rows:
+            available[word].setdefault(question_type, []).append((question_id, question, served))
+        questions = {question_type: [] for question_type in QUESTION_TYPES}
+
+        # Words without other questions go into the matching question first
+        defined = random.sample([word for word in words if word in definitions], k=len(definitions))
+        defined.sort(key=lambda word: bool(available[word]))
+        if len(defined) >= MATCHING_SIZE:
+            questions['matching'].append(self.matching_question(defined[:MATCHING_SIZE], definitions))
+        matched = set(defined[:MATCHING_SIZE]) if questions['matching'] else set()
+        missing = [word for word in words if not available[word] and word not in matched]
+
+        served = []
+        count = len(questions['matching'])
+        if reserve_missing:
+            num_questions -= len(missing)
+        while count < num_questions:
+            progress = False
+            for word in words:
+                if count >= num_questions:
+                    break
+                types = [question_type for question_type in WORD_TYPES if available[word].get(question_type)]
+                if not types:
+                    continue
+                # Balance the types, and among equally used ones take the least served question
+                question_type = min(types, key=lambda question_type: (
+                    len(questions[question_type]), available[word][question_type][0][2]
+                ))
+                question_id, question, _ = available[word][question_type].pop(0)
+                questions[question_type].append(json.loads(question))
+                served.append(question_id)
+                count += 1
+                progress = True
+            if not progress:
+                break
+
+        if mark_served:
+            with self.lock, self.conn:
+                self.conn.executemany('UPDATE questions SET served = served + 1 WHERE id = ?', [(i,) for i in served])
+        return questions, missing
+
+    def mark_served(self, questions):
+        """
+        Count questions as served, e.g. those of a prefetched session once it is started.
+
+        :param questions: Dictionary from question type to a list of questions. Matching questions,
+                          which are assembled rather than stored, are skipped.
+        """
+        rows = [(question['word'].lower(), question_type, json.dumps(question))
+                for question_type, items in questions.items() if question_type in WORD_TYPES
+                for question in items if isinstance(question.get('word'), str)]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'UPDATE questions SET served = served + 1 WHERE word = ? AND type = ? AND question = ?', rows
+            )
+
+    @staticmethod
+    def matching_question(words, definitions):
+        letters = [chr(ord('A') + i) for i in range(len(words))]
+        order = random.sample(range(len(words)), len(words))
+        return {
+            "words": words,
+            "definitions": [definitions[words[i]] for i in order],
+            "correct_matches": {str(j + 1): letters[order.index(j)] for j in range(len(words))}
+        }
+
+
+def session_questions(bank, agent, words, num_questions, refiller=None, mark_served=True):
+    """
+    Questions of a session: assembled from the bank, and generated by the LLM only for words the bank has none for.
+
+    Generated questions are added to the bank, and words running low are queued for a refill.
+
+    :param bank: QuestionBank to assemble from.
+    :param agent: QuestionAgent generating questions on a bank miss.
+    :param words: Words of the session.
+    :param num_questions: Number of questions wanted.
+    :param refiller: QuestionBankRefiller to queue low words to, None to skip refilling.
+    :param mark_served: Whether the questions count as served now, False for sessions that may never be shown.
+    :return: Generator of (question type, question) pairs, the bank's first.
+    """
+    questions, missing = bank.assemble(words, num_questions, mark_served, reserve_missing=True)
+    for question_type, items in questions.items():
+        for question in items:
+            yield question_type, question
+    # At least one question per missing word where it fits, never more than num_questions in total
+    num_missing = min(max(len(missing), round(num_questions * len(missing) / len(words))),
+                      num_questions - sum(len(items) for items in questions.values())) if missing else 0
+    if num_missing > 0:
+        print(f"No questions in the bank for {missing}, generating them.")
+        for question_type, question in agent.query_stream(word_list=missing, num_questions=num_missing):
+            # Questions the model writes beyond the ones asked for are kept for later sessions
+            shown = num_missing > 0
+            bank.add_questions({question_type: [question]}, served=int(mark_served and shown))
+            if shown:
+                num_missing -= 1
+                yield question_type, question
+    if refiller is not None:
+        refiller.request(bank.low_stock(words))
+
+
+def generate_questions(bank, agent, words, questions_per_word=3):
+    """
+    Generate questions for a batch of words with the LLM and store the valid ones.
+
+    :return: Number of questions stored.
+    """
+    try:
+        questions = agent.query(word_list=words, num_questions=len(words) * questions_per_word)
+    except (ValueError, KeyError) as e:
+        print(f"Question generation failed for {words}: {e}")
+        return 0
+    return bank.add_questions(questions)
+
+
+class QuestionBankRefiller:
+    """
+    Background thread that generates questions for words whose stock runs low.
+    """
+    def __init__(self, bank, agent, batch_size=config.QUESTION_BANK_BATCH_SIZE):
+        """
+        :param bank: QuestionBank to fill.
+        :param agent: QuestionAgent used to generate questions.
+        :param batch_size: Number of words per generation request.
+        """
+        self.bank = bank
+        self.agent = agent
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.pending = set()
+        self.pending_lock = threading.Lock()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def request(self, words):
+        """
+        Queue words for a refill, words already queued are skipped.
+        """
+        with self.pending_lock:
+            words = [word for word in words if word not in self.pending]
+            self.pending.update(words)
+        for word in words:
+            self.queue.put(word)
+
+    def run(self):
+        while True:
+            words = [self.queue.get()]
+            while len(words) < self.batch_size and not self.queue.empty():
+                words.append(self.queue.get())
+            try:
+                generate_questions(self.bank, self.agent, words)
+            except Exception as e:
+                # Keep the worker alive, e.g. through API errors
+                print(f"Refilling questions for {words} failed: {e}")
+            with self.pending_lock:
+                self.pending.difference_update(words)
+
+
+def fill_bank(data_path='dataset/data.csv', batch_size=config.QUESTION_BANK_BATCH_SIZE, num_workers=4):
+    """
+    Pre-generate questions for every word of the word list that is low on stock.
+    """
+    from agent.questionagent import QuestionAgent
+    from concurrent.futures import ThreadPoolExecutor
+    import pandas as pd
+
+    bank = QuestionBank()
+    agent = QuestionAgent()
+    words = bank.low_stock(pd.read_csv(data_path)['word'].tolist())
+    batches = [words[start:start + batch_size] for start in range(0, len(words), batch_size)]
+    print(f"Generating questions for {len(words)} words in {len(batches)} batches.")
+    stored = 0
+    with ThreadPoolExecutor(num_workers) as executor:
+        for i, count in enumerate(executor.map(lambda batch: generate_questions(bank, agent, batch), batches)):
+            stored += count
+            print(f"Batch {i + 1}/{len(batches)}: {stored} questions stored.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pre-generate the question bank for the word list.')
+    parser.add_argument('--batch-size', type=int, default=config.QUESTION_BANK_BATCH_SIZE, help='words per request')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent requests')
+    args = parser.parse_args()
+    fill_bank(batch_size=args.batch_size, num_workers=args.workers)
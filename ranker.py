@@ -0,0 +1,100 @@
+from embedding.glove import GloveEmbedding
+from exams import exam_mask
+from score_word_list import CEFR_LEVEL, SCORE_WEIGHTS, find_rows
+from typing import List, Optional, Tuple, Union
+import config
+import numpy as np
+
+
+class LocalRanker:
+    """
+    Selects the words of a session without the LLM.
+
+    Every candidate is scored in one pass with the terms and weights of score_word_list.score,
+    then the top words are picked with maximal marginal relevance (MMR) over their GloVe
+    vectors, so near-synonyms do not crowd out the rest of the topic.
+    """
+    def __init__(self, embedding=None, db=None, diversity=config.RANKER_DIVERSITY):
+        """
+        :param embedding: GloveEmbedding to compare words with, loaded if None.
+        :param db: VectorDB the candidates come from, used to look up their exams. Without it
+                   the candidates are taken as already filtered by exam.
+        :param diversity: Weight of the redundancy penalty of MMR between 0 and 1, 0 ranks by score alone.
+        """
+        if not 0 <= diversity <= 1:
+            raise ValueError("Diversity must be between 0 and 1.")
+        self.embedding = embedding or GloveEmbedding()
+        self.db = db
+        self.diversity = diversity
+
+    def scores(self, vocab_table: List[Tuple[str, str, float]], keywords: Optional[List[str]] = None,
+               exam: Optional[Union[str, List[str]]] = None):
+        """
+        :return: Tuple of (score of each candidate, unit GloVe vector of each candidate).
+        """
+        words = [word for word, _, _ in vocab_table]
+        vectors, found = self.embedding.encode_many(words)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+        similarity = np.zeros(len(words))
+        if keywords:
+            key_vecs, key_found = self.embedding.encode_many(keywords)
+            key_vecs = key_vecs[key_found]
+            if len(key_vecs):
+                key_vecs /= np.linalg.norm(key_vecs, axis=1, keepdims=True)
+                similarity = (vectors @ key_vecs.T).mean(axis=1)
+        # Per word version of the CEFR centring, which favours levels around B1 and B2
+        levels = np.array([CEFR_LEVEL.get(str(cefr).lower(), 0.5) for _, cefr, _ in vocab_table])
+        cefr = 1.0 - 2.0 * np.abs(levels - 0.5)
+        exam_hit = np.ones(len(words))
+        if exam is not None and self.db is not None:
+            columns = self.db.query_all(as_columns=True)
+            rows, exists = find_rows(columns['word'], words)
+            exam_hit = exists & ((columns['exams'][rows] & exam_mask(exam)) != 0)
+        memory = 1.0 - np.array([float(rating) for _, _, rating in vocab_table])
+
+        terms = np.stack([similarity, cefr, exam_hit, memory], axis=1)
+        weights = np.array(list(SCORE_WEIGHTS.values()))
+        return terms @ weights / weights.sum(), vectors
+
+    def query(self, vocab_table: List[Tuple[str, str, float]], num_words=10, keywords: Optional[List[str]] = None,
+              exam: Optional[Union[str, List[str]]] = None) -> List[str]:
+        """
+        :param vocab_table: Candidates as (word, CEFR, understanding rating) tuples.
+        :param num_words: Number of words to select.
+        :param keywords: Keywords of the learning goal, the similarity term is left out if None.
+        :param exam: Exam of the learning goal, every candidate counts as a hit if None or without a db.
+        :return: The selected words, best first.
+        """
+        if not vocab_table:
+            return []
+        scores, vectors = self.scores(vocab_table, keywords, exam)
+        num_words = min(num_words, len(vocab_table))
+
+        selected = []
+        redundancy = np.zeros(len(scores))
+        available = np.ones(len(scores), dtype=bool)
+        for _ in range(num_words):
+            mmr = np.where(available, (1 - self.diversity) * scores - self.diversity * redundancy, -np.inf)
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            available[best] = False
+            redundancy = np.maximum(redundancy, vectors @ vectors[best])
+        return [vocab_table[i][0] for i in selected]
+
+
+def create_ranker(name=config.RANKER, embedding=None, db=None):
+    """
+    Create the ranker selecting the words of a session.
+
+    :param name: 'llm' for the RankingAgent, 'local' for the LocalRanker.
+    :param embedding: GloveEmbedding shared with the local ranker.
+    :param db: VectorDB shared with the local ranker.
+    """
+    if name == 'llm':
+        from agent.rankingagent import RankingAgent
+        return RankingAgent()
+    if name == 'local':
+        return LocalRanker(embedding, db)
+    raise ValueError(f"Unknown ranker '{name}', must be 'llm' or 'local'.")
@@ -1,5 +1,7 @@
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Union
 from vectordb import VectorDB
+from exams import exam_mask
 from embedding.glove import GloveEmbedding
 import numpy as np
 
@@ -12,67 +14,74 @@ CEFR_LEVEL = {
     'c1': 0.8,
     'c2': 1.0
 }
+# Weights of the similarity, CEFR, exam and memory terms of score()
+SCORE_WEIGHTS = {
+    'similarity': 1.0,
+    'cefr': 0.5,
+    'exam': 2.0,
+    'memory': 1.0
+}
+
+
+@lru_cache(maxsize=None)
+def get_db():
+    # Shared across score() calls, so the metadata cache is loaded once
+    return VectorDB()
+
+
+def load_word_columns():
+    return get_db().query_all(as_columns=True)
 
 
-def load_word_dict():
-    db = VectorDB()
-    vocab = db.query_all()
-    result = {}
-    for row in vocab:
-        result[row['word']] = {
-            'CEFR': row['CEFR'],
-            'mem': row['understanding_rating'],
-            'IELTS': row['IELTS'],
-            'GRE': row['GRE'],
-        }
-    return result
+def find_rows(vocab: np.ndarray, words: List[str]):
+    """
+    Locate words in the vocabulary column.
+
+    :return: Tuple of (row of each word, boolean mask of the words that exist).
+    """
+    if len(vocab) == 0:
+        return np.zeros(len(words), dtype=np.int64), np.zeros(len(words), dtype=bool)
+    sorter = np.argsort(vocab)
+    positions = np.searchsorted(vocab, words, sorter=sorter).clip(max=len(vocab) - 1)
+    rows = sorter[positions]
+    return rows, vocab[rows] == np.asarray(words, dtype=str)
+
+
+def get_word_similarities(words: List[str], keywords: List[str], embedding):
+    word_vecs, _ = embedding.encode_many(words)
+    key_vecs, _ = embedding.encode_many(keywords)
+    word_vecs /= np.linalg.norm(word_vecs, axis=1, keepdims=True)
+    key_vecs /= np.linalg.norm(key_vecs, axis=1, keepdims=True)
+    return word_vecs @ key_vecs.T
 
 
 def get_word_similarity(word1: str, word2: str, embedding):
-    vec1 = np.array(embedding.encode(word1))
-    vec2 = np.array(embedding.encode(word2))
-    return np.dot(vec1, vec2) / np.linalg.norm(vec1) / np.linalg.norm(vec2)
+    return get_word_similarities([word1], [word2], embedding)[0, 0]
 
 
-def score(words: List[str], keywords: List[str], exam: Optional[str]):
-    word_dict = load_word_dict()
+def score(words: List[str], keywords: List[str], exam: Optional[Union[str, List[str]]]):
+    columns = load_word_columns()
     embedding = GloveEmbedding()
 
     # Check for hallucination
-    checked_words = []
-    for word in words:
-        if word in word_dict:
-            checked_words.append(word)
-    hallucination_scalar = len(checked_words) / len(words)
-    words = checked_words
-
-    average_similarities = []
-    for word in words:
-        similarities = []
-        for key in keywords:
-            similarities.append(get_word_similarity(word, key, embedding))
-        average_similarities.append(np.mean(similarities))
-    score_similarity = np.mean(average_similarities)
-
-    cefr_levels = []
-    for word in words:
-        cefr_levels.append(CEFR_LEVEL[word_dict[word]['CEFR']])
+    rows, found = find_rows(columns['word'], words)
+    hallucination_scalar = np.mean(found)
+    rows = rows[found]
+    words = [word for word, exists in zip(words, found) if exists]
+
+    score_similarity = np.mean(get_word_similarities(words, keywords, embedding))
+
+    cefr_levels = [CEFR_LEVEL[cefr] for cefr in columns['CEFR'][rows].tolist()]
     cefr_score = (0.5 - np.abs(np.mean(cefr_levels) - 0.5)) * 2.0
 
     exam_hit_rate = 1.0
     if exam is not None:
-        exam_hits = []
-        for word in words:
-            exam_hits.append(1.0 if word_dict[word][exam] else 0.0)
-        exam_hit_rate = np.mean(exam_hits)
+        exam_hit_rate = np.mean((columns['exams'][rows] & exam_mask(exam)) != 0)
     
-    mem_levels = []
-    for word in words:
-        mem_levels.append(word_dict[word]['mem'])
-    mem_score = 1.0 - np.mean(mem_levels)
+    mem_score = 1.0 - np.mean(columns['understanding_rating'][rows])
 
     scores = np.array([score_similarity, cefr_score, exam_hit_rate, mem_score])
-    weights = np.array([1.0, 0.5, 2.0, 1.0])
+    weights = np.array(list(SCORE_WEIGHTS.values()))
 
     print('Hallucination scalar:', hallucination_scalar)
     print('[Similarity, CEFR, Exam, Mem]', scores)
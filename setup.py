@@ -1,22 +1,63 @@
 from vectordb import VectorDB
 from embedding.glove import GloveEmbedding
-from tqdm import tqdm
+import argparse
+import hashlib
 import pandas as pd
 
 
 DATA_PATH = 'dataset/data.csv'
 
 
+def row_hash(word, level, exams, embedding_model):
+    content = '\x1f'.join(map(str, [word, level, exams, embedding_model]))
+    return hashlib.sha1(content.encode('utf8')).hexdigest()
+
+
 def setup():
+    """
+    Synchronize the database with the word list.
+
+    Only the difference to what is stored is written: new words are embedded and
+    added, words whose row changed get their metadata (and, after an embedding
+    model change, their embedding) updated with ratings kept, and words no longer
+    in the list are deleted. Running it again without changes writes nothing.
+    """
     emb = GloveEmbedding()
     db = VectorDB()
     df = pd.read_csv(DATA_PATH)
+    df['row_hash'] = [row_hash(*row, emb.version) for row in df[['word', 'level', 'exams']].itertuples(index=False)]
+
+    stored = db.query_row_hashes()
+    is_new = ~df['word'].isin(stored.keys())
+    is_changed = ~is_new & (df['row_hash'] != df['word'].map(lambda word: stored.get(word, (None, None))[0]))
+    needs_embedding = is_changed & (df['word'].map(lambda word: stored.get(word, (None, None))[1]) != emb.version)
+    removed = sorted(set(stored) - set(df['word']))
 
-    # Insert to database, only needs to be executed once
-    for row in tqdm(df.itertuples(index=False), total=len(df), desc='Processing'):
-        word, cefr, in_ielts, in_gre = row.word, row.level, row.ielts, row.gre
-        vec = emb.encode(word)
-        db.add_word(word, vec, cefr, in_ielts==1, in_gre==1)
+    added = df[is_new]
+    if len(added):
+        vecs, _ = emb.encode_many(added['word'].tolist())
+        db.add_words(added['word'].tolist(), vecs, added['level'].tolist(), added['exams'].tolist(),
+                     row_hashes=added['row_hash'].tolist(), embedding_model=emb.version)
+
+    for changed, reembed in [(df[is_changed & ~needs_embedding], False), (df[needs_embedding], True)]:
+        if len(changed):
+            vecs = emb.encode_many(changed['word'].tolist())[0] if reembed else None
+            db.update_words(changed['word'].tolist(), changed['level'].tolist(), changed['exams'].tolist(),
+                            row_hashes=changed['row_hash'].tolist(), embedding_model=emb.version, embeddings=vecs)
+
+    db.delete_words(removed)
+    print(f'Added {is_new.sum()}, updated {is_changed.sum()} ({needs_embedding.sum()} re-embedded), '
+          f'deleted {len(removed)} words.')
 
 if __name__ == '__main__':
-    setup()
+    parser = argparse.ArgumentParser(description='Build the word database from dataset/data.csv.')
+    parser.add_argument('--import-snapshot', metavar='PATH', help='bulk-load a snapshot instead of ingesting the word list')
+    parser.add_argument('--export-snapshot', metavar='PATH', help='write the database to a snapshot after syncing')
+    args = parser.parse_args()
+
+    if args.import_snapshot:
+        VectorDB().import_snapshot(args.import_snapshot)
+    else:
+        setup()
+    if args.export_snapshot:
+        VectorDB().export_snapshot(args.export_snapshot)
@@ -0,0 +1,38 @@
+import sqlite3
+
+
+# Stay below SQLite's limit on the number of host parameters
+CHUNK_SIZE = 500
+
+
+def connect(path):
+    """
+    Open a SQLite database that threads share, serialized by the caller's lock.
+
+    WAL mode lets readers in other processes run alongside the writer, and commits
+    only sync at checkpoints.
+
+    :param path: Path of the database file.
+    """
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def select_in_chunks(conn, sql, keys, params=()):
+    """
+    Run a query with an IN list over any number of keys, CHUNK_SIZE keys at a time.
+
+    :param conn: Database connection.
+    :param sql: Query with a {placeholders} field for the IN list, e.g. 'SELECT ... WHERE word IN ({placeholders})'.
+    :param keys: Values of the IN list.
+    :param params: Parameters of the query before the IN list.
+    :return: List of the rows of every chunk.
+    """
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), CHUNK_SIZE):
+        chunk = keys[start:start + CHUNK_SIZE]
+        rows.extend(conn.execute(sql.format(placeholders=','.join('?' * len(chunk))), [*params, *chunk]))
+    return rows
@@ -0,0 +1,43 @@
+import grader
+import pytest
+
+
+MULTIPLE_CHOICE = {
+    'word': 'apple',
+    'question': "Which word means 'apple'?",
+    'choices': ['apple', 'pear', 'plum', 'fig'],
+    'correct_answer': 'A'
+}
+MATCHING = {
+    'words': ['apple', 'pear', 'plum'],
+    'definitions': ['a pear', 'a plum', 'an apple'],
+    'correct_matches': {'1': 'C', '2': 'A', '3': 'B'}
+}
+
+
+def test_can_grade_only_objective_questions_with_answer_keys():
+    assert grader.can_grade('multiple-choice', MULTIPLE_CHOICE)
+    assert grader.can_grade('scenario-based', MULTIPLE_CHOICE)
+    assert grader.can_grade('matching', MATCHING)
+    assert not grader.can_grade('short-answer', {'word': 'apple', 'question': "What does 'apple' mean?"})
+    assert not grader.can_grade('multiple-choice', {**MULTIPLE_CHOICE, 'correct_answer': None})
+
+
+@pytest.mark.parametrize('answer, score', [('A', 1), ('a', 1), (' A ', 1), ('apple', 1), ('B', 0), ('pear', 0), ('', 0)])
+def test_grade_multiple_choice(answer, score):
+    assert grader.grade('multiple-choice', MULTIPLE_CHOICE, answer) == {'apple': score}
+
+
+def test_grade_accepts_answer_key_given_as_choice():
+    question = {**MULTIPLE_CHOICE, 'correct_answer': 'plum'}
+    assert grader.grade('scenario-based', question, 'C') == {'apple': 1}
+
+
+def test_grade_matching_scores_each_word():
+    assert grader.grade('matching', MATCHING, '1-C, 2-A, 3-B') == {'apple': 1, 'pear': 1, 'plum': 1}
+    assert grader.grade('matching', MATCHING, '1-c,2-B, 3-None') == {'apple': 1, 'pear': 0, 'plum': 0}
+
+
+def test_grade_rejects_questions_without_answer_key():
+    with pytest.raises(ValueError):
+        grader.grade('short-answer', {'word': 'apple', 'question': "What does 'apple' mean?"}, 'a fruit')
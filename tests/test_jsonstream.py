@@ -0,0 +1,59 @@
+from agent.jsonstream import JsonStreamParser
+import json
+import pytest
+
+
+QUESTIONS = {
+    'multiple-choice': [
+        {'word': 'brace', 'question': 'Which "word" closes with }?', 'choices': ['{', '}', '[', ']'],
+         'correct_answer': 'B'},
+        {'word': 'quote', 'question': 'A backslash \\ then a quote \\"', 'choices': ['a', 'b', 'c', 'd'],
+         'correct_answer': 'A'},
+    ],
+    'matching': [
+        {'words': ['a', 'b'], 'definitions': ['[first]', '{second}'], 'correct_matches': {'1': 'A', '2': 'B'}},
+    ],
+    'short-answer': [],
+    'scenario-based': [
+        {'word': 'café', 'question': 'Unicode é and a tab\t', 'choices': ['w', 'x', 'y', 'z'],
+         'correct_answer': 'D'},
+    ],
+}
+EXPECTED = [(key, question) for key, items in QUESTIONS.items() for question in items]
+TEXT = '```json\n' + json.dumps(QUESTIONS, indent=4) + '\n```'
+
+
+def feed_in_chunks(text, size):
+    parser = JsonStreamParser()
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+
+def test_whole_text():
+    assert feed_in_chunks(TEXT, len(TEXT)) == EXPECTED
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7])
+def test_chunks_split_inside_strings_and_escapes(size):
+    assert feed_in_chunks(TEXT, size) == EXPECTED
+
+
+def test_every_split_point():
+    # Every position of the text, including inside each escape sequence, as the end of a chunk
+    for split in range(len(TEXT)):
+        parser = JsonStreamParser()
+        assert parser.feed(TEXT[:split]) + parser.feed(TEXT[split:]) == EXPECTED
+
+
+def test_objects_are_returned_as_soon_as_they_close():
+    text = json.dumps(QUESTIONS)
+    first_end = text.index('"B"}') + len('"B"}')
+    parser = JsonStreamParser()
+    assert parser.feed(text[:first_end - 1]) == []
+    assert parser.feed(text[first_end - 1:first_end]) == EXPECTED[:1]
+
+
+def test_compact_json_without_whitespace():
+    assert feed_in_chunks(json.dumps(QUESTIONS, separators=(',', ':'), ensure_ascii=False), 5) == EXPECTED
@@ -0,0 +1,97 @@
+from backend.numpybackend import NumpyBackend
+import numpy as np
+import pytest
+
+
+WORDS = ['apple', 'pear', 'plum', 'fig', 'kiwi']
+# Float ratings only: chromadb does not compare the integer 0 against float thresholds
+METADATAS = [
+    {'CEFR': 'a1', 'understanding_rating': 0.1, 'exams': 1},
+    {'CEFR': 'a2', 'understanding_rating': 0.3, 'exams': 2},
+    {'CEFR': 'b1', 'understanding_rating': 0.6, 'exams': 3},
+    {'CEFR': 'b2', 'understanding_rating': 0.9, 'exams': 0},
+    {'CEFR': 'c1', 'understanding_rating': 0.2, 'exams': 5, 'row_hash': 'abc'},
+]
+FILTERS = [
+    {'CEFR': 'b1'},
+    {'CEFR': {'$ne': 'b1'}},
+    {'understanding_rating': {'$lt': 0.5}},
+    {'understanding_rating': {'$gte': 0.6}},
+    {'CEFR': {'$in': ['a1', 'b2', 'c2']}},
+    {'CEFR': {'$nin': ['a1', 'b2']}},
+    {'$and': [{'CEFR': {'$in': ['a2', 'b1', 'c1']}}, {'understanding_rating': {'$lt': 0.5}}]},
+    {'$or': [{'CEFR': 'a1'}, {'understanding_rating': {'$gt': 0.8}}]},
+    {'$and': [{'$or': [{'CEFR': 'a1'}, {'CEFR': 'b1'}]}, {'exams': {'$bits_any': 2}}]},
+    {'exams': {'$bits_any': 1}},
+    {'exams': {'$bits_any': 6}},
+    {'exams': {'$bits_all': 3}},
+    {'exams': {'$bits_all': 8}},
+    {'row_hash': 'abc'},
+]
+EXPECTED = [
+    ['plum'],
+    ['apple', 'pear', 'fig', 'kiwi'],
+    ['apple', 'pear', 'kiwi'],
+    ['plum', 'fig'],
+    ['apple', 'fig'],
+    ['pear', 'plum', 'kiwi'],
+    ['pear', 'kiwi'],
+    ['apple', 'fig'],
+    ['plum'],
+    ['apple', 'plum', 'kiwi'],
+    ['pear', 'plum', 'kiwi'],
+    ['plum'],
+    [],
+    ['kiwi'],
+]
+
+
+def add_words(backend):
+    backend.add(WORDS, np.eye(len(WORDS), dtype=np.float32), METADATAS)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = NumpyBackend(str(tmp_path / 'numpydb'))
+    add_words(backend)
+    return backend
+
+
+@pytest.mark.parametrize('where, expected', list(zip(FILTERS, EXPECTED)))
+def test_match(backend, where, expected):
+    assert backend.get(where=where)['ids'] == expected
+
+
+def test_match_missing_key_matches_nothing(backend):
+    assert backend.get(where={'missing': 1})['ids'] == []
+    assert backend.get(where={'$or': [{'missing': 1}, {'CEFR': 'a1'}]})['ids'] == ['apple']
+
+
+def test_match_agrees_with_chroma(backend, tmp_path):
+    pytest.importorskip('chromadb')
+    from backend.chromabackend import ChromaBackend
+    chroma = ChromaBackend(str(tmp_path / 'chromadb'))
+    add_words(chroma)
+    for where in FILTERS:
+        assert sorted(chroma.get(where=where)['ids']) == sorted(backend.get(where=where)['ids']), where
+
+
+def test_query_filters_before_ranking(backend):
+    results = backend.query([np.eye(len(WORDS))[0]], n_results=2, where={'exams': {'$bits_any': 2}})
+    assert results['ids'] == [['pear', 'plum']]
+
+
+def test_persist_round_trip(backend):
+    backend.update(['pear'], [{'understanding_rating': 0.7}])
+    backend.persist()
+    loaded = NumpyBackend(backend.persist_directory)
+    assert loaded.ids.tolist() == WORDS
+    assert loaded.get(['pear'])['metadatas'][0]['understanding_rating'] == 0.7
+    assert loaded.get(['pear'])['metadatas'][0]['CEFR'] == 'a2'
+
+
+def test_load_rejects_mismatched_files(backend):
+    backend.persist()
+    np.save(backend.embeddings_path, np.eye(3, dtype=np.float32))
+    with pytest.raises(ValueError):
+        NumpyBackend(backend.persist_directory)
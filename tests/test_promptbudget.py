@@ -0,0 +1,75 @@
+from agent import promptbudget
+from agent.promptbudget import compact_cell, count_tokens, fit_table
+import pytest
+
+
+ROWS = [(f'word{i}', 'b1', 0.123456, 'IELTS') for i in range(100)]
+
+
+@pytest.fixture
+def no_tiktoken(monkeypatch):
+    monkeypatch.setattr(promptbudget, 'tiktoken', None)
+    promptbudget.get_encoding.cache_clear()
+    yield
+    promptbudget.get_encoding.cache_clear()
+
+
+def test_estimates_tokens_without_tiktoken(no_tiktoken):
+    assert promptbudget.get_encoding('gpt-4o') is None
+    assert count_tokens('') == 0
+    assert count_tokens('abcd') == 1
+    assert count_tokens('abcde') == 2
+
+
+def test_compact_cell():
+    assert compact_cell(0.0) == '0'
+    assert compact_cell(0.5) == '0.5'
+    assert compact_cell(0.123456) == '0.12'
+    assert compact_cell('b1') == 'b1'
+    assert compact_cell(3) == '3'
+
+
+def test_no_budget_keeps_every_distinct_row():
+    text, kept = fit_table(ROWS + ROWS[:10], None)
+    assert kept == 100
+    assert text.split('\n')[0] == 'word0, b1, 0.12, IELTS'
+
+
+@pytest.mark.parametrize('strategy', ['truncate', 'sample'])
+def test_fits_budget(no_tiktoken, strategy):
+    text, kept = fit_table(ROWS, budget=300, reserved_tokens=100, strategy=strategy)
+    assert 0 < kept < len(ROWS)
+    assert len(text.split('\n')) == kept
+    assert count_tokens(text) <= 200
+
+
+def test_truncate_keeps_the_first_rows(no_tiktoken):
+    text, kept = fit_table(ROWS, budget=200)
+    assert text.split('\n') == [f'word{i}, b1, 0.12, IELTS' for i in range(kept)]
+
+
+def test_sample_keeps_rows_in_order_and_depends_on_seed(no_tiktoken):
+    first, _ = fit_table(ROWS, budget=200, strategy='sample', seed=0)
+    again, _ = fit_table(ROWS, budget=200, strategy='sample', seed=0)
+    other, _ = fit_table(ROWS, budget=200, strategy='sample', seed=1)
+    assert first == again != other
+    numbers = [int(line.split(',')[0][len('word'):]) for line in first.split('\n')]
+    assert numbers == sorted(numbers)
+
+
+def test_budget_below_reserved_keeps_nothing(no_tiktoken):
+    assert fit_table(ROWS, budget=50, reserved_tokens=100) == ('', 0)
+
+
+def test_rejects_unknown_strategy():
+    with pytest.raises(ValueError):
+        fit_table(ROWS, 100, strategy='first')
+
+
+def test_fits_budget_with_tiktoken():
+    pytest.importorskip('tiktoken')
+    if promptbudget.get_encoding('gpt-4o') is None:
+        pytest.skip('tiktoken cannot load its vocabulary')
+    text, kept = fit_table(ROWS, budget=300, reserved_tokens=100)
+    assert 0 < kept < len(ROWS)
+    assert count_tokens(text) <= 200
@@ -0,0 +1,123 @@
+from questionbank import QuestionBank, session_questions, validate_question
+import pytest
+
+
+def multiple_choice(word, answer='A', choices=None, question=None):
+    return {
+        'word': word,
+        'question': question or f"Which word means '{word}'?",
+        'choices': choices or [word, 'other', 'another', 'none'],
+        'correct_answer': answer
+    }
+
+
+def matching(words):
+    return {
+        'words': words,
+        'definitions': [f'definition of {word}' for word in words],
+        'correct_matches': {str(i + 1): chr(ord('A') + i) for i in range(len(words))}
+    }
+
+
+@pytest.fixture
+def bank(tmp_path):
+    return QuestionBank(str(tmp_path / 'questions.sqlite'))
+
+
+def test_validate_accepts_antonym_question():
+    question = multiple_choice('generous', 'B', ['kind', 'stingy', 'warm', 'open'],
+                               "Select the word opposite in meaning to 'generous'.")
+    validate_question('multiple-choice', question)
+
+
+def test_validate_rejects_invalid_answer_letter():
+    with pytest.raises(ValueError):
+        validate_question('multiple-choice', multiple_choice('apple', 'E'))
+
+
+def test_validate_rejects_question_without_its_word():
+    question = multiple_choice('apple', 'A', ['car', 'charger', 'crate', 'cart'], 'I drove the ____.')
+    with pytest.raises(ValueError):
+        validate_question('scenario-based', question)
+
+
+def test_validate_rejects_inconsistent_matching():
+    question = matching(['a', 'b', 'c'])
+    question['correct_matches']['3'] = 'A'
+    with pytest.raises(ValueError):
+        validate_question('matching', question)
+
+
+def test_add_questions_skips_invalid(bank):
+    stored = bank.add_questions({'multiple-choice': [multiple_choice('apple'), multiple_choice('pear', 'Z')]})
+    assert stored == 1
+    assert bank.stock(['apple', 'pear']) == {'apple': 1, 'pear': 0}
+
+
+def test_assemble_covers_words_and_reports_missing(bank):
+    bank.add_questions({
+        'multiple-choice': [multiple_choice('apple'), multiple_choice('pear')],
+        'short-answer': [{'word': 'apple', 'question': "What does 'apple' mean?"}]
+    })
+    questions, missing = bank.assemble(['apple', 'pear', 'plum'], num_questions=2)
+    words = [question['word'] for items in questions.values() for question in items]
+    assert sorted(words) == ['apple', 'pear']
+    assert missing == ['plum']
+
+
+def test_assemble_prefers_unserved_questions(bank):
+    bank.add_questions({
+        'multiple-choice': [multiple_choice('apple')],
+        'short-answer': [{'word': 'apple', 'question': "What does 'apple' mean?"}]
+    })
+    first, _ = bank.assemble(['apple'], num_questions=1)
+    second, _ = bank.assemble(['apple'], num_questions=1)
+    assert [key for key, items in first.items() if items] != [key for key, items in second.items() if items]
+    assert bank.stock(['apple']) == {'apple': 0}
+
+
+def test_assemble_builds_matching_from_definitions(bank):
+    bank.add_questions({'matching': [matching(['apple', 'pear', 'plum'])]})
+    questions, missing = bank.assemble(['apple', 'pear', 'plum'], num_questions=3)
+    assert missing == []
+    assert len(questions['matching']) == 1
+    validate_question('matching', questions['matching'][0])
+    assert sorted(questions['matching'][0]['words']) == ['apple', 'pear', 'plum']
+
+
+def test_mark_served_counts_unmarked_assembly(bank):
+    bank.add_questions({'multiple-choice': [multiple_choice('apple')]})
+    questions, _ = bank.assemble(['apple'], num_questions=1, mark_served=False)
+    assert bank.stock(['apple']) == {'apple': 1}
+    bank.mark_served(questions)
+    assert bank.stock(['apple']) == {'apple': 0}
+
+
+class FakeQuestionAgent:
+    def __init__(self):
+        self.requested = []
+
+    def query_stream(self, word_list, num_questions):
+        self.requested.append(num_questions)
+        for i in range(num_questions + 2):
+            word = word_list[i % len(word_list)]
+            yield 'short-answer', {'word': word, 'question': f"Use '{word}' in sentence {i}."}
+
+
+def test_session_questions_never_exceed_num_questions(bank):
+    bank.add_questions({'short-answer': [{'word': 'apple', 'question': f"Use 'apple' in sentence {i}."}
+                                         for i in range(5)]})
+    agent = FakeQuestionAgent()
+    questions = list(session_questions(bank, agent, ['apple', 'plum'], num_questions=4))
+    assert len(questions) == 4
+    assert sorted(question['word'] for _, question in questions) == ['apple', 'apple', 'apple', 'plum']
+    assert agent.requested == [1]
+    # The surplus the model wrote is stored unserved
+    assert bank.stock(['plum']) == {'plum': 2}
+
+
+def test_assemble_matches_words_case_insensitively(bank):
+    bank.add_questions({'multiple-choice': [multiple_choice('Abandon')]})
+    questions, missing = bank.assemble(['Abandon'], num_questions=1)
+    assert missing == []
+    assert [question['word'] for question in questions['multiple-choice']] == ['Abandon']
@@ -0,0 +1,68 @@
+from agent import responsecache
+from agent.responsecache import ResponseCache
+import pytest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(responsecache.time, 'time', clock.time)
+    return clock
+
+
+def cache(tmp_path, **kwargs):
+    return ResponseCache(str(tmp_path / 'responses.sqlite'), **kwargs)
+
+
+def test_get_returns_stored_response_for_the_same_key(tmp_path, clock):
+    responses = cache(tmp_path)
+    responses.put('gpt-4o', 1.0, 'system', 'prompt', 'response')
+    assert responses.get('gpt-4o', 1.0, 'system', 'prompt') == 'response'
+    assert responses.get('gpt-4o', 0.5, 'system', 'prompt') is None
+    assert responses.get('gpt-4o', 1.0, 'other system', 'prompt') is None
+    assert responses.get('gpt-4o-mini', 1.0, 'system', 'prompt') is None
+    assert responses.stats() == {'hits': 1, 'misses': 3, 'entries': 1, 'bytes': len('response')}
+
+
+def test_evicts_least_recently_used_beyond_max_bytes(tmp_path, clock):
+    responses = cache(tmp_path, max_bytes=10)
+    responses.put('gpt-4o', 1.0, 'system', 'a', 'aaaa')
+    clock.now += 1
+    responses.put('gpt-4o', 1.0, 'system', 'b', 'bbbb')
+    clock.now += 1
+    assert responses.get('gpt-4o', 1.0, 'system', 'a') == 'aaaa'
+    clock.now += 1
+    responses.put('gpt-4o', 1.0, 'system', 'c', 'cccc')
+    assert responses.get('gpt-4o', 1.0, 'system', 'b') is None
+    assert responses.get('gpt-4o', 1.0, 'system', 'a') == 'aaaa'
+    assert responses.get('gpt-4o', 1.0, 'system', 'c') == 'cccc'
+    assert responses.stats()['bytes'] == 8
+
+
+def test_expires_responses_after_ttl(tmp_path, clock):
+    responses = cache(tmp_path, ttl=60)
+    responses.put('gpt-4o', 1.0, 'system', 'old', 'old response')
+    clock.now += 30
+    # Reading a response does not extend its lifetime
+    assert responses.get('gpt-4o', 1.0, 'system', 'old') == 'old response'
+    clock.now += 31
+    assert responses.get('gpt-4o', 1.0, 'system', 'old') is None
+    responses.put('gpt-4o', 1.0, 'system', 'new', 'new response')
+    assert responses.stats()['entries'] == 1
+
+
+def test_discard_drops_one_response(tmp_path, clock):
+    responses = cache(tmp_path)
+    responses.put('gpt-4o', 1.0, 'system', 'bad', 'not json')
+    responses.put('gpt-4o', 1.0, 'system', 'good', '{}')
+    responses.discard('gpt-4o', 1.0, 'system', 'bad')
+    assert responses.get('gpt-4o', 1.0, 'system', 'bad') is None
+    assert responses.get('gpt-4o', 1.0, 'system', 'good') == '{}'
@@ -1,33 +1,192 @@
-import chromadb
+from exams import exam_mask
+from exitflush import register_flush_on_exit
+from learnerstore import LearnerStore
+import config
+import numpy as np
+import threading
+import time
+
+
+# Rank offset of reciprocal-rank fusion, the usual default from the literature
+RRF_K = 60
+# Words rated at or above this are considered mastered and left out of sessions
+MASTERED_RATING = 0.5
+CEFR_LEVELS = ["a1", "a2", "b1", "b2", "c1", "c2"]
+
+
+def build_where(exam=None, cefr=None, max_rating=None, exam_match="any"):
+    """
+    Build a metadata filter evaluated inside the backend.
+
+    :param exam: Only keep words of this registered exam, or of these exams given as a list, None for any word.
+    :param cefr: Only keep words whose CEFR level is within this (lowest, highest) range, e.g. ('a2', 'b2').
+    :param max_rating: Only keep words whose understanding rating is below this threshold.
+    :param exam_match: With several exams, 'any' keeps words of at least one of them, 'all' words of every one.
+    :return: A where clause, or None if there is nothing to filter on.
+    """
+    clauses = []
+    if exam is not None:
+        if exam_match not in ["any", "all"]:
+            raise ValueError("Exam match must be 'any' or 'all'.")
+        mask = exam_mask(exam)
+        if not mask:
+            raise ValueError("No exam given to filter on.")
+        clauses.append({"exams": {"$bits_" + exam_match: mask}})
+    if cefr is not None:
+        lowest, highest = (CEFR_LEVELS.index(level.lower()) for level in cefr)
+        clauses.append({"CEFR": {"$in": CEFR_LEVELS[lowest:highest + 1]}})
+    if max_rating is not None:
+        # New words are rated with the integer 0, which chromadb does not compare against float thresholds
+        below = {"understanding_rating": {"$lt": max_rating}}
+        clauses.append({"$or": [below, {"understanding_rating": 0}]} if max_rating > 0 else below)
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def create_backend(name, persist_directory=None):
+    """
+    Create the storage backend of VectorDB.
+
+    :param name: Backend name, 'chroma' or 'numpy'.
+    :param persist_directory: Directory to persist the database, None for the backend's default.
+    """
+    if name == 'chroma':
+        from backend.chromabackend import ChromaBackend
+        return ChromaBackend(persist_directory or "./chromadb")
+    if name == 'numpy':
+        from backend.numpybackend import NumpyBackend
+        return NumpyBackend(persist_directory or "./numpydb")
+    raise ValueError(f"Unknown backend '{name}', must be 'chroma' or 'numpy'.")
+
+
+class MetadataCache:
+    """
+    Columnar in-process copy of the metadata of every word.
+    """
+    def __init__(self, results):
+        self.words = list(results["ids"])
+        self.word_array = np.asarray(self.words, dtype=str)
+        self.rows = {word: i for i, word in enumerate(self.words)}
+        metadatas = results["metadatas"]
+        keys = dict.fromkeys(key for metadata in metadatas for key in metadata)
+        self.columns = {key: np.asarray([metadata.get(key) for metadata in metadatas]) for key in keys}
+        if "understanding_rating" in self.columns:
+            self.columns["understanding_rating"] = self.columns["understanding_rating"].astype(np.float64)
+        # Words whose rating changed since the last flush
+        self.dirty = set()
+
+    def metadata(self, row):
+        # Keys a word does not have are None in the columns
+        metadata = {key: column[row] for key, column in self.columns.items()}
+        return {key: value.item() if isinstance(value, np.generic) else value
+                for key, value in metadata.items() if value is not None}
 
 
 class VectorDB:
-    # word, CEFR, embedding, understanding_rating, IELTS, GRE
-    def __init__(self, persist_directory="./chromadb"):
+    # word, CEFR, embedding, understanding_rating, exams
+    def __init__(self, persist_directory=None, backend=None,
+                 flush_size=config.CACHE_FLUSH_SIZE, flush_interval=config.CACHE_FLUSH_INTERVAL, learner_store=None):
         """
         Initialize the WordEmbeddingDatabase.
 
-        :param persist_directory: Directory to persist the ChromaDB database.
+        Metadata is read from the backend once and then served from memory. Rating
+        changes are buffered and written back by flush(), which also runs when
+        flush_size changes are pending, flush_interval seconds have passed since
+        the last flush, or the process exits.
+
+        Methods reading or writing ratings take a user_id. With one, ratings are read
+        from and written to the learner's rows of a LearnerStore instead, and the word
+        collection is only read, so one instance serves every learner.
+
+        :param persist_directory: Directory to persist the database, defaults to config.DB_PATH.
+        :param backend: Backend name ('chroma' or 'numpy'), defaults to config.DB_BACKEND.
+        :param flush_size: Number of pending rating changes that triggers a flush.
+        :param flush_interval: Seconds after which pending rating changes are flushed.
+        :param learner_store: LearnerStore holding per-learner ratings, created on first use when None.
         """
-        self.client = chromadb.PersistentClient(path=persist_directory)
-        
-        # Check if collection exists; if so, reuse it
-        existing_collections = [col.name for col in self.client.list_collections()]
-        if "words_collection" in existing_collections:
-            self.collection = self.client.get_collection(name="words_collection")
-        else:
-            print("Collection is not found, creating a new one.")
-            self.collection = self.client.create_collection(name="words_collection")
+        self.backend = create_backend(backend or config.DB_BACKEND, persist_directory or config.DB_PATH)
+        self.learners = learner_store
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.cache = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.last_flush = time.monotonic()
+        # Guards the metadata cache, which sessions prefetched in the background update concurrently
+        self.lock = threading.RLock()
+        register_flush_on_exit(self)
+
+    def __del__(self):
+        # Pending changes of an instance collected before exit are not lost
+        if 'lock' in self.__dict__:
+            self.flush()
+
+    def _learner_store(self):
+        with self.lock:
+            if self.learners is None:
+                self.learners = LearnerStore()
+            return self.learners
+
+    def _metadata_cache(self):
+        with self.lock:
+            if self.cache is None:
+                self.cache_misses += 1
+                self.cache = MetadataCache(self.backend.get())
+            else:
+                self.cache_hits += 1
+                self._maybe_flush()
+            return self.cache
+
+    def _maybe_flush(self):
+        if self.cache is None or not self.cache.dirty:
+            return
+        if len(self.cache.dirty) >= self.flush_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write buffered rating changes back to the backend.
+
+        Only the understanding_rating key is written, so changes other processes made
+        to the rest of the metadata since the cache was filled are kept.
+        """
+        with self.lock:
+            if self.cache is not None and self.cache.dirty:
+                ids = list(self.cache.dirty)
+                ratings = self.cache.columns["understanding_rating"][[self.cache.rows[word] for word in ids]].tolist()
+                metadatas = [{"understanding_rating": rating} for rating in ratings]
+                self.backend.update(ids, metadatas)
+                self.backend.persist()
+                self.cache.dirty.clear()
+            self.last_flush = time.monotonic()
+
+    def invalidate_cache(self):
+        """
+        Flush pending changes and drop the metadata cache, it is reloaded on next use.
+        """
+        with self.lock:
+            self.flush()
+            self.cache = None
 
-    def add_word(self, word, embedding, CEFR, IELTS, GRE):
+    def cache_stats(self):
+        """
+        :return: Dictionary with the cache hits, misses and number of pending writes.
+        """
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "pending": len(self.cache.dirty) if self.cache is not None else 0
+        }
+
+    def add_word(self, word, embedding, CEFR, exams=0):
         """
         Add a single word with its embedding, CEFR, and exam metadata to the database.
 
         :param word: Word to add.
         :param embedding: Corresponding embedding for the word (vector).
         :param CEFR: CEFR level of the word.
-        :param IELTS: Boolean indicating if the word is in the IELTS exam.
-        :param GRE: Boolean indicating if the word is in the GRE exam.
+        :param exams: Exams whose word lists contain the word, a list of names or a mask of exam bits.
         """
         if embedding is None:
             raise ValueError(f"Embedding for '{word}' is None. Cannot add to the database.")
@@ -36,118 +195,399 @@ class VectorDB:
         metadata = {
             'CEFR': CEFR,
             'understanding_rating': 0,  # Initialize to 0
-            'IELTS': IELTS,
-            'GRE': GRE
+            'exams': exam_mask(exams)
         }
         
-        self.collection.add(
-            documents=[word],
-            metadatas=[metadata],
-            embeddings=[embedding],
-            ids=[word]
+        self.backend.add([word], [embedding], [metadata])
+        self.invalidate_cache()
+
+    def add_words(self, words, embeddings, CEFR, exams, batch_size=1000, row_hashes=None, embedding_model=None):
+        """
+        Add many words to the database, writing them in chunks.
+
+        :param words: List of words to add.
+        :param embeddings: Embeddings of the words, a list of vectors or an array of shape (n, dim).
+        :param CEFR: CEFR levels of the words.
+        :param exams: Exam membership of each word, lists of names or masks of exam bits.
+        :param batch_size: Number of words written per call to the backend, where it writes in chunks.
+        :param row_hashes: Content hashes of the source rows, used by incremental re-ingestion.
+        :param embedding_model: Version of the model that computed the embeddings.
+        """
+        if not (len(words) == len(embeddings) == len(CEFR) == len(exams)):
+            raise ValueError("Words, embeddings, CEFR and exams must have the same length.")
+
+        metadatas = self._word_metadatas(CEFR, exams, [0] * len(words), row_hashes, embedding_model)
+        self.backend.add(list(words), embeddings, metadatas, batch_size=batch_size)
+        self.backend.persist()
+        self.invalidate_cache()
+
+    def update_words(self, words, CEFR, exams, row_hashes=None, embedding_model=None, embeddings=None):
+        """
+        Update the metadata, and optionally the embeddings, of existing words while keeping their ratings.
+
+        :param words: List of words to update.
+        :param CEFR: CEFR levels of the words.
+        :param exams: Exam membership of each word, lists of names or masks of exam bits.
+        :param row_hashes: Content hashes of the source rows.
+        :param embedding_model: Version of the model that computed the embeddings.
+        :param embeddings: New embeddings of the words, None to keep the stored ones.
+        """
+        if not words:
+            return
+        cache = self._metadata_cache()
+        missing = [word for word in words if word not in cache.rows]
+        if missing:
+            raise ValueError(f"Words do not exist in the database: {missing[:10]}")
+
+        ratings = cache.columns["understanding_rating"][[cache.rows[word] for word in words]].tolist()
+        metadatas = self._word_metadatas(CEFR, exams, ratings, row_hashes, embedding_model)
+        self.flush()
+        self.backend.update(list(words), metadatas, embeddings=embeddings)
+        self.backend.persist()
+        self.invalidate_cache()
+
+    def delete_words(self, words):
+        """
+        Delete words from the database.
+
+        :param words: List of words to delete.
+        """
+        if not words:
+            return
+        self.flush()
+        self.backend.delete(list(words))
+        self.backend.persist()
+        self.invalidate_cache()
+
+    def export_snapshot(self, path):
+        """
+        Write every word, its metadata and the float32 embedding matrix to a single columnar .npz file.
+
+        :param path: Path of the snapshot file.
+        """
+        self.flush()
+        results = self.backend.get(include_embeddings=True)
+        columns = MetadataCache(results).columns
+        for key, column in columns.items():
+            if column.dtype == object:
+                # Words without this key get the empty value of its type
+                present = [value for value in column if value is not None]
+                fill = np.zeros(1, dtype=np.asarray(present).dtype).item()
+                columns[key] = np.asarray([fill if value is None else value for value in column])
+        np.savez(
+            path,
+            ids=np.asarray(results["ids"], dtype=str),
+            embeddings=np.asarray(results["embeddings"], dtype=np.float32),
+            **{'meta_' + key: column for key, column in columns.items()}
         )
 
-    def query_by_similarity(self, query_embedding, n_results=2):
+    def import_snapshot(self, path, batch_size=5000):
+        """
+        Bulk-load a snapshot written by export_snapshot into an empty database.
+
+        :param path: Path of the snapshot file.
+        :param batch_size: Number of words written per call to the backend, where it writes in chunks.
+        """
+        if self.backend.count():
+            raise ValueError("The database is not empty. Import snapshots into a new database.")
+        with np.load(path) as data:
+            ids = data["ids"].tolist()
+            embeddings = data["embeddings"]
+            columns = {key[len('meta_'):]: data[key].tolist() for key in data.files if key.startswith('meta_')}
+        metadatas = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        self.backend.add(ids, embeddings, metadatas, batch_size=batch_size)
+        self.backend.persist()
+        self.invalidate_cache()
+
+    def query_row_hashes(self):
+        """
+        :return: Dictionary from word to its (row hash, embedding model), None for words ingested without them.
+        """
+        cache = self._metadata_cache()
+        hashes = cache.columns["row_hash"].tolist() if "row_hash" in cache.columns else [None] * len(cache.words)
+        models = cache.columns["embedding_model"].tolist() if "embedding_model" in cache.columns else [None] * len(cache.words)
+        return {word: (row_hash, model) for word, row_hash, model in zip(cache.words, hashes, models)}
+
+    @staticmethod
+    def _word_metadatas(CEFR, exams, ratings, row_hashes=None, embedding_model=None):
+        metadatas = []
+        for i, (cefr, word_exams, rating) in enumerate(zip(CEFR, exams, ratings)):
+            metadata = {
+                'CEFR': cefr,
+                'understanding_rating': rating,
+                'exams': exam_mask(word_exams)
+            }
+            if row_hashes is not None:
+                metadata['row_hash'] = row_hashes[i]
+            if embedding_model is not None:
+                metadata['embedding_model'] = embedding_model
+            metadatas.append(metadata)
+        return metadatas
+
+    def query_by_similarity(self, query_embedding, n_results=2, exam=None, cefr=None, max_rating=None, exam_match="any",
+                            user_id=None):
         """
         Query the database for similar words by embedding similarity.
 
+        Filters are evaluated inside the backend, so n_results matching words are
+        returned whenever enough of them exist.
+
         :param query_embedding: Embedding to query for.
         :param n_results: Number of results to return.
-        :return: List of dictionaries with word, CEFR, and understanding_rating.
+        :param exam: Only return words of this exam, or of these exams given as a list.
+        :param cefr: Only return words within this (lowest, highest) CEFR range, e.g. ('a2', 'b2').
+        :param max_rating: Only return words whose understanding rating is below this threshold.
+        :param exam_match: With several exams, 'any' returns words of at least one of them, 'all' words of every one.
+        :param user_id: Learner whose ratings are returned and filtered on, None for the ratings stored with the words.
+        :return: List of dictionaries with word, CEFR, understanding_rating and the exams mask.
         """
         if query_embedding is None:
             raise ValueError("Query embedding is None. Please provide a valid embedding.")
         
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            include=["documents", "metadatas"]
-        )
-        
-        # Extract required fields from the results
+        return self._search([query_embedding], n_results, exam, cefr, max_rating, exam_match, user_id)[0]
+
+    def query_by_similarity_many(self, query_embeddings, n_results=10, fusion="union", exam=None, cefr=None,
+                                 max_rating=None, exam_match="any", user_id=None):
+        """
+        Query the database with several embeddings in one batched search and fuse the rankings.
+
+        :param query_embeddings: List of embeddings (or array of shape (n, dim)) to query for.
+        :param n_results: Number of results per query for 'union', number of fused results otherwise.
+        :param fusion: How rankings are combined:
+                       'union' keeps every query's results, interleaved by rank and deduplicated;
+                       'rrf' ranks words by reciprocal-rank fusion of the per-query rankings;
+                       'centroid' queries once with the mean of the embeddings.
+        :param exam: Only return words of this exam, or of these exams given as a list.
+        :param cefr: Only return words within this (lowest, highest) CEFR range, e.g. ('a2', 'b2').
+        :param max_rating: Only return words whose understanding rating is below this threshold.
+        :param exam_match: With several exams, 'any' returns words of at least one of them, 'all' words of every one.
+        :param user_id: Learner whose ratings are returned and filtered on, None for the ratings stored with the words.
+        :return: List of dictionaries with word, CEFR, understanding_rating and the exams mask, without duplicates.
+        """
+        if query_embeddings is None or len(query_embeddings) == 0:
+            raise ValueError("Query embeddings are empty. Please provide at least one embedding.")
+        if fusion not in ["union", "rrf", "centroid"]:
+            raise ValueError("Fusion must be 'union', 'rrf' or 'centroid'.")
+
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        if fusion == "centroid":
+            return self.query_by_similarity(query_embeddings.mean(axis=0).tolist(), n_results, exam, cefr, max_rating,
+                                            exam_match, user_id)
+
+        results = self._search(query_embeddings.tolist(), n_results, exam, cefr, max_rating, exam_match, user_id)
+        rows = {row["word"]: row for query_rows in results for row in query_rows}
+
+        if fusion == "union":
+            words = []
+            for rank in range(max(len(query_rows) for query_rows in results)):
+                words.extend(query_rows[rank]["word"] for query_rows in results if rank < len(query_rows))
+            words = list(dict.fromkeys(words))
+        else:
+            scores = {}
+            for query_rows in results:
+                for rank, row in enumerate(query_rows):
+                    scores[row["word"]] = scores.get(row["word"], 0.0) + 1.0 / (RRF_K + rank + 1)
+            words = sorted(scores, key=scores.get, reverse=True)[:n_results]
+
+        return [rows[word] for word in words]
+
+    def _search(self, query_embeddings, n_results, exam, cefr, max_rating, exam_match="any", user_id=None):
+        """
+        Run one batched backend query.
+
+        :return: One list of result rows per query embedding.
+        """
+        if user_id is None:
+            if max_rating is not None:
+                # The backend filters on ratings, so it needs the buffered ones
+                self.flush()
+            where = build_where(exam, cefr, max_rating, exam_match)
+            results = self.backend.query(query_embeddings, n_results=n_results, where=where)
+            return [
+                [self._similarity_row(word, metadata) for word, metadata in zip(ids, metadatas)]
+                for ids, metadatas in zip(results["ids"], results["metadatas"])
+            ]
+
+        # Ratings live in the learner store. Over-fetching by the number of mastered words
+        # still returns n_results unmastered words whenever that many exist.
+        learners = self._learner_store()
+        mastered = learners.mastered_words(user_id, max_rating) if max_rating is not None else set()
+        where = build_where(exam, cefr, exam_match=exam_match)
+        results = self.backend.query(query_embeddings, n_results=n_results + len(mastered), where=where)
+        ratings = learners.get_ratings(user_id, {word for ids in results["ids"] for word in ids})
         output = []
-        for document, metadata in zip(results["documents"][0], results["metadatas"][0]):
-            output.append({
-                "word": document,
-                "IELTS": metadata["IELTS"],
-                "GRE": metadata["GRE"],
-                "CEFR": metadata["CEFR"],
-                "understanding_rating": metadata["understanding_rating"]
-            })
-        
+        for ids, metadatas in zip(results["ids"], results["metadatas"]):
+            rows = [
+                self._similarity_row(word, metadata, ratings.get(word, 0))
+                for word, metadata in zip(ids, metadatas) if word not in mastered
+            ]
+            output.append(rows[:n_results])
         return output
 
-    def query_by_exam(self, exam_name):
+    def _similarity_row(self, word, metadata, rating=None):
+        if rating is None:
+            rating = metadata["understanding_rating"]
+            if self.cache is not None and word in self.cache.dirty:
+                rating = self.cache.columns["understanding_rating"][self.cache.rows[word]].item()
+        return {
+            "word": word,
+            "exams": metadata.get("exams", 0),
+            "CEFR": metadata["CEFR"],
+            "understanding_rating": rating
+        }
+
+    def _learner_ratings(self, user_id, words=None):
+        """
+        :return: Dictionary from word to the learner's rating, or None when ratings are stored with the words.
+        """
+        if user_id is None:
+            return None
+        return self._learner_store().get_ratings(user_id, words)
+
+    def _columns(self, cache, rows, keys, user_id=None):
+        """
+        Parallel arrays of the given rows, one per key plus "word".
+        """
+        output = {"word": cache.word_array[rows]}
+        for key in keys:
+            output[key] = cache.columns[key][rows] if key in cache.columns else np.zeros(len(output["word"]))
+        learner_ratings = self._learner_ratings(user_id) if "understanding_rating" in keys else None
+        if learner_ratings is not None:
+            output["understanding_rating"] = np.fromiter(
+                (learner_ratings.get(word, 0.0) for word in output["word"].tolist()),
+                dtype=np.float64, count=len(output["word"])
+            )
+        return output
+
+    def query_by_exam(self, exam_name, as_columns=False, exam_match="any", user_id=None):
         """
         Query the database by exam name.
 
-        :param exam_name: Exam name to filter by ('IELTS' or 'GRE').
+        :param exam_name: Registered exam name to filter by, or a list of them.
+        :param as_columns: Return a dictionary of parallel NumPy arrays instead of one dictionary per word.
+        :param exam_match: With several exams, 'any' returns words of at least one of them, 'all' words of every one.
+        :param user_id: Learner whose ratings are returned, None for the ratings stored with the words.
         :return: List of dictionaries with word, CEFR, and understanding_rating.
         """
-        if exam_name not in ["IELTS", "GRE"]:
-            raise ValueError("Exam name must be 'IELTS' or 'GRE'.")
-        
-        exam_query = {exam_name: True}
-        results = self.collection.get(where=exam_query, include=["documents", "metadatas"])
+        if exam_match not in ["any", "all"]:
+            raise ValueError("Exam match must be 'any' or 'all'.")
+        mask = exam_mask(exam_name)
+
+        cache = self._metadata_cache()
+        if cache.words and "exams" in cache.columns:
+            bits = cache.columns["exams"].astype(np.int64) & mask
+            rows = np.flatnonzero(bits != 0 if exam_match == "any" else bits == mask)
+        else:
+            rows = np.zeros(0, dtype=np.int64)
+        if as_columns:
+            return self._columns(cache, rows, ["CEFR", "understanding_rating"], user_id)
+        learner_ratings = self._learner_ratings(user_id)
         
         # Extract required fields from the results
         output = []
-        for document, metadata in zip(results["documents"], results["metadatas"]):
+        for row in rows:
+            word = cache.words[row]
             output.append({
-                "word": document,
-                "CEFR": metadata["CEFR"],
-                "understanding_rating": metadata["understanding_rating"]
+                "word": word,
+                "CEFR": cache.columns["CEFR"][row].item(),
+                "understanding_rating": (
+                    cache.columns["understanding_rating"][row].item() if learner_ratings is None
+                    else learner_ratings.get(word, 0)
+                )
             })
         
         return output
     
-    def query_by_word(self, word):
-        # Fetch the current metadata and embedding for the word using the 'ids' field
-        results = self.collection.get(ids=[word], include=["metadatas", "documents", "embeddings"])
-        if not results.get("metadatas"):
+    def query_by_word(self, word, user_id=None):
+        """
+        Query the metadata of a single word.
+
+        :param word: Word to look up.
+        :param user_id: Learner whose rating is returned, None for the rating stored with the word.
+        :return: Dictionary with word, CEFR, understanding_rating and the exams mask.
+        """
+        cache = self._metadata_cache()
+        if word not in cache.rows:
             raise ValueError(f"The word '{word}' does not exist in the database.")
-        return results
+        output = dict(word=word, **cache.metadata(cache.rows[word]))
+        learner_ratings = self._learner_ratings(user_id, [word])
+        if learner_ratings is not None:
+            output["understanding_rating"] = learner_ratings.get(word, 0)
+        return output
+
+    def query_all(self, as_columns=False, user_id=None):
+        """
+        Query the metadata of every word.
 
-    def query_all(self):
-        results = self.collection.get(include=["documents", "metadatas"])
+        :param as_columns: Return a dictionary of parallel NumPy arrays ("word", "CEFR",
+                           "understanding_rating", "exams") instead of one dictionary per word.
+        :param user_id: Learner whose ratings are returned, None for the ratings stored with the words.
+        :return: List of dictionaries with id, word, CEFR, understanding_rating and the exams mask.
+        """
+        cache = self._metadata_cache()
+        if as_columns:
+            return self._columns(cache, np.arange(len(cache.words)), ["CEFR", "understanding_rating", "exams"], user_id)
+        learner_ratings = self._learner_ratings(user_id)
         output = []
-        for doc_id, document, metadata in zip(results["ids"], results["documents"], results["metadatas"]):
+        for doc_id, metadata in zip(cache.words, map(cache.metadata, range(len(cache.words)))):
             output.append({
                 "id": doc_id,
-                "word": document,
+                "word": doc_id,
                 "CEFR": metadata["CEFR"],
-                "understanding_rating": metadata["understanding_rating"],
-                "IELTS": metadata["IELTS"],
-                "GRE": metadata["GRE"]
+                "understanding_rating": (
+                    metadata["understanding_rating"] if learner_ratings is None
+                    else learner_ratings.get(doc_id, 0)
+                ),
+                "exams": metadata.get("exams", 0)
             })
         return output
 
-    def update_understanding_rating(self, word, new_rating, k=0.6):
+    def update_understanding_rating(self, word, new_rating, k=0.6, user_id=None):
         """
         Update the understanding rating of a specific word.
 
         :param word: The word to update.
         :param new_rating: The new understanding rating to set.
+        :param user_id: Learner whose rating is updated, None for the rating stored with the word.
+        """
+        missing = self.update_understanding_ratings({word: new_rating}, k=k, user_id=user_id)
+        if missing:
+            raise ValueError(f"The word '{word}' does not exist in the database.")
+
+    def update_understanding_ratings(self, ratings, k=0.6, user_id=None):
         """
-        if not isinstance(new_rating, (int, float)):
-            raise ValueError(f"Understanding rating {new_rating} must be a number.")
-        if new_rating < 0 or new_rating > 1:
-            raise ValueError(f"Understanding rating {new_rating} must be between 0 and 1.")
+        Update the understanding ratings of many words.
 
-        results = self.query_by_word(word)
+        Ratings are updated in the metadata cache and buffered until the next flush,
+        which writes back metadata only, embeddings are left untouched. With a
+        user_id, they are written to the learner store in one transaction instead.
 
-        # Update the understanding rating in the metadata
-        metadata = results["metadatas"][0]
-        metadata["understanding_rating"] = k * new_rating + (1 - k) * metadata["understanding_rating"]
-        embedding = results["embeddings"][0].tolist()
+        :param ratings: Dictionary from word to its new understanding rating.
+        :param k: Weight of the new rating in the exponential moving average.
+        :param user_id: Learner whose ratings are updated, None for the ratings stored with the words.
+        :return: List of words that do not exist in the database and were skipped.
+        """
+        for word, new_rating in ratings.items():
+            if not isinstance(new_rating, (int, float)):
+                raise ValueError(f"Understanding rating {new_rating} for '{word}' must be a number.")
+            if new_rating < 0 or new_rating > 1:
+                raise ValueError(f"Understanding rating {new_rating} for '{word}' must be between 0 and 1.")
+        if not ratings:
+            return []
 
-        # Update the entry
-        self.collection.upsert(
-            documents=[word],
-            metadatas=[metadata],
-            embeddings=[embedding],
-            ids=[word]
-        )
+        with self.lock:
+            cache = self._metadata_cache()
+            found = [word for word in ratings if word in cache.rows]
+            if found and user_id is not None:
+                self._learner_store().update_ratings(user_id, {word: ratings[word] for word in found}, k=k)
+            elif found:
+                rows = np.array([cache.rows[word] for word in found])
+                new_ratings = np.array([ratings[word] for word in found], dtype=np.float64)
+                column = cache.columns["understanding_rating"]
+                column[rows] = k * new_ratings + (1 - k) * column[rows]
+                cache.dirty.update(found)
+                self._maybe_flush()
+            return [word for word in ratings if word not in cache.rows]
 
 
 # Unit test for vector DB
@@ -157,8 +597,7 @@ if __name__ == "__main__":
     # Define input data
     words = ['hello', 'world', 'in', 'python']
     difficulties = ['A1', 'A2', 'B1', 'B2']
-    in_IELTS = [True, False, False, True]
-    in_GRE = [False, True, True, False]
+    in_exams = [["IELTS"], ["GRE"], ["GRE"], ["IELTS"]]
     
     embeddings = [
         [0.1, 0.2, 0.3],
@@ -167,8 +606,8 @@ if __name__ == "__main__":
         [1.0, 1.1, 1.2]
     ]
 
-    # for word, embedding, CEFR, ielts, gre in zip(words, embeddings, difficulties, in_IELTS, in_GRE):
-    #     db.add_word(word, embedding, CEFR, ielts, gre)
+    # for word, embedding, CEFR, exams in zip(words, embeddings, difficulties, in_exams):
+    #     db.add_word(word, embedding, CEFR, exams)
 
     query_embedding = [0.15, 0.25, 0.35]  # Example query embedding
     try:
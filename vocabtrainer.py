@@ -1,20 +1,25 @@
 from agent.analyzeragent import AnalyzerAgent
 from agent.queryagent import QueryAgent
-from agent.rankingagent import RankingAgent
 from agent.questionagent import QuestionAgent
 from embedding.glove import GloveEmbedding
+from questionbank import QUESTION_TYPES, QuestionBank, QuestionBankRefiller, session_questions
 from quiz import Quiz
-from vectordb import VectorDB
-import numpy as np
+from ranker import create_ranker
+from vectordb import VectorDB, MASTERED_RATING
+from exams import find_exam
+import grader
+import json
 
 
 class VocabTrainer:
     def __init__(self):
         self.query_agent = QueryAgent()
-        self.ranking_agent = RankingAgent()
         self.question_agent = QuestionAgent()
+        self.question_bank = QuestionBank()
+        self.refiller = QuestionBankRefiller(self.question_bank, QuestionAgent())
         self.embedding = GloveEmbedding()
         self.db = VectorDB()
+        self.ranker = create_ranker(embedding=self.embedding, db=self.db)
         self.num_words = 5
         self.num_questions = 5
     
@@ -43,25 +48,22 @@ class VocabTrainer:
         print("Describe your learning goal in a few sentences.")
         print("For example: I am preparing for IELTS, and I want to learn words related to travelling.")
 
+        # Ratings are kept per learner, or with the words when no name is given
+        user_id = input("Enter your name (optional): ").strip() or None
         user_input = input("Enter your learning goal: ").strip()
         user_query = self.query_agent.query(user_input)
         print('user_query:', user_query) # returns exam, topic, and keywords
 
-        # Compute the average of keywords
-        query_vector = np.zeros(self.embedding.dim)
-        query_actual_len = 0
-        for word in user_query['keywords']:
-            if self.embedding.contains(word):
-                query_actual_len += 1
-                query_vector += self.embedding.encode(word)
-        query_vector /= query_actual_len
-        
-        # Query words similar to the keywords
-        candidate_table = self.db.query_by_similarity(query_vector, n_results=200)
-        candidate_vocab = []
-        for row in candidate_table:
-            if row['understanding_rating'] < 0.5:
-                candidate_vocab.append((row['word'], row['CEFR'], row['understanding_rating']))
+        # Query words similar to the average of keywords
+        keyword_vectors, mask = self.embedding.encode_many(user_query['keywords'] or [])
+        exam = find_exam(user_query['exam'])
+        candidate_table = []
+        if mask.any():
+            candidate_table = self.db.query_by_similarity_many(
+                keyword_vectors[mask], n_results=200, fusion="centroid", exam=exam, max_rating=MASTERED_RATING,
+                user_id=user_id
+            )
+        candidate_vocab = [(row['word'], row['CEFR'], row['understanding_rating']) for row in candidate_table]
         
         # Check whether the user has already mastered the words
         if len(candidate_vocab) == 0:
@@ -70,27 +72,34 @@ class VocabTrainer:
         # Confirm the context
         self.print_context_res(user_query)
 
-        selected_words = self.ranking_agent.query(vocab_table=candidate_vocab, num_words=self.num_words)
+        selected_words = self.ranker.query(vocab_table=candidate_vocab, num_words=self.num_words,
+                                           keywords=user_query['keywords'], exam=exam)
         print('selected_words:', selected_words)
         
         print("Generating questions...")
-        questions_json = self.question_agent.query(word_list=selected_words, num_questions=self.num_questions)
+        questions = {question_type: [] for question_type in QUESTION_TYPES}
+        for question_type, question in session_questions(self.question_bank, self.question_agent, selected_words,
+                                                         self.num_questions, self.refiller):
+            questions[question_type].append(question)
 
         #TODO: use GUI to prompt questions
-        quiz = Quiz(questions_json=questions_json)
+        quiz = Quiz(questions_json=json.dumps(questions))
         while True:
             run_result = quiz.run_quiz()
             if run_result is None:
                 # No more questions available
                 break
             question, user_answer = run_result
-            # Use the analyzer to evaluate the respnse
-            analyzer = AnalyzerAgent()
-            understanding_map = analyzer.query(question, user_answer)
+            if grader.can_grade(question['type'], question['content']):
+                # Objective questions are checked against their answer keys
+                understanding_map = grader.grade(question['type'], question['content'], user_answer)
+            else:
+                # Use the analyzer to evaluate the respnse
+                analyzer = AnalyzerAgent()
+                understanding_map = analyzer.query(question, user_answer)
             print(understanding_map)
             # update the understanding level
-            for word, rating in understanding_map.items():
-                self.db.update_understanding_rating(word=word, new_rating=rating)
+            self.db.update_understanding_ratings(understanding_map, user_id=user_id)
 
 if __name__ == '__main__':
     trainer = VocabTrainer()
@@ -1,10 +1,15 @@
 import gradio as gr
 from agent.queryagent import QueryAgent
-from agent.rankingagent import RankingAgent
 from agent.questionagent import QuestionAgent
 from embedding.glove import GloveEmbedding
 from agent.analyzeragent import AnalyzerAgent
-from vectordb import VectorDB
+from questionbank import QUESTION_TYPES, QuestionBank, QuestionBankRefiller, session_questions
+from prefetch import SessionPrefetcher
+from ranker import create_ranker
+from vectordb import VectorDB, MASTERED_RATING
+from exams import find_exam
+import config
+import grader
 import numpy as np
 import os
 import pickle
@@ -17,11 +22,15 @@ QUERY_LOG_FILE = "query_log.pkl"
 class VocabTrainerGUI():
     def __init__(self):
         self.query_agent = QueryAgent()
-        self.ranking_agent = RankingAgent()
         self.question_agent = QuestionAgent()
         self.analyzer_agent = AnalyzerAgent()
+        self.question_bank = QuestionBank()
+        self.refiller = QuestionBankRefiller(self.question_bank, QuestionAgent())
         self.embedding = GloveEmbedding()
         self.db = VectorDB()
+        self.ranker = create_ranker(embedding=self.embedding, db=self.db)
+        # Questions of a prefetched session only count as served once it is started
+        self.prefetcher = SessionPrefetcher(on_take=lambda session: self.question_bank.mark_served(session['questions']))
         self.num_words = 7
         self.num_questions = 10
     
@@ -59,36 +68,101 @@ class VocabTrainerGUI():
             self.query_log = {}
             print(f"Error loading query log: {e}. Starting with an empty log.")
 
+    def parse_goal(self, user_input):
+        """
+        :return: Exam, topic and keywords of a learning goal, from the query log or the QueryAgent.
+        """
+        if isinstance(self.query_log.get(user_input), dict):
+            user_query = self.query_log[user_input]
+            print("Loaded user_query from query_log: ", user_query)
+        else:
+            user_query = self.query_agent.query(user_input)
+            print('user_query:', user_query) # returns exam, topic, and keywords
+
+            # Save query log
+            self.query_log[user_input] = user_query
+            self.save_query_log()
+        return user_query
+
+    def find_candidates(self, user_query, user_id, exclude=()):
+        """
+        Unmastered words similar to the keywords of a goal, filtered by exam inside the database.
+
+        :param user_query: Parsed learning goal.
+        :param user_id: Learner whose ratings decide which words are mastered.
+        :param exclude: Words to treat as mastered.
+        :return: List of (word, CEFR, understanding rating) tuples.
+        """
+        exam = find_exam(user_query['exam'])
+        keyword_embs, found = self.embedding.encode_many(user_query['keywords'] or [])
+        if not found.any():
+            # Nothing to search for, shown like a goal without words left to learn
+            print(f"None of the keywords {user_query['keywords']} are in the vocabulary.")
+            return []
+        exclude = set(exclude)
+        keyword_table = self.db.query_by_similarity_many(
+            keyword_embs[found], n_results=10 + len(exclude), fusion="union", exam=exam, max_rating=MASTERED_RATING,
+            user_id=user_id
+        )
+        return [(row['word'], row['CEFR'], row['understanding_rating']) for row in keyword_table
+                if row['word'] not in exclude]
+
+    def select_words(self, user_query, vocab_table):
+        return self.ranker.query(vocab_table=vocab_table, num_words=self.num_words, keywords=user_query['keywords'],
+                                 exam=find_exam(user_query['exam']))
+
+    def plan_session(self, user_query, user_id, exclude=()):
+        """
+        Compute a whole session up front: candidates, ranked words and questions.
+
+        The next round is planned with the words of the current session excluded, projecting
+        that they will be mastered.
+
+        :return: Dictionary with the candidates, selected words and questions by type,
+                 or None if every word of the goal is mastered.
+        """
+        vocab_table = self.find_candidates(user_query, user_id, exclude)
+        if len(vocab_table) == 0:
+            return None
+        selected_words = self.select_words(user_query, vocab_table)
+        questions = {question_type: [] for question_type in QUESTION_TYPES}
+        for question_type, question in session_questions(self.question_bank, self.question_agent, selected_words,
+                                                         self.num_questions, self.refiller, mark_served=False):
+            questions.setdefault(question_type, []).append(question)
+        return {"candidates": [row[0] for row in vocab_table], "words": selected_words, "questions": questions}
+
+    def prefetch_next_session(self, key, user_query, user_id, exclude):
+        """
+        :param key: Browser session and goal the next round belongs to.
+        :param user_id: Learner the round is planned for.
+        """
+        self.prefetcher.schedule(key, lambda: self.plan_session(user_query, user_id, exclude))
+
     def run(self):
         with gr.Blocks(title='VocabTrainer', theme=gr.themes.Soft()) as demo:
             component_map = {}
             components = []
             self.load_query_log()
 
-            def start_btn_click(user_input):
-                if user_input in self.query_log:
-                    candidate_vocab = self.query_log[user_input]
-                    print("Loaded candidate_vocab from query_log: ", candidate_vocab)
+            def round_key(request, goal):
+                # Rounds are prefetched per browser session, so learners never take each other's
+                return request.session_hash, goal
+
+            def learner_id(name, request):
+                # Ratings are kept per entered name, or per browser session without one
+                return name.strip() or request.session_hash
+
+            def start_session(user_input, user_id, request, session=None):
+                """
+                Show the quiz of a session, computing it unless a prefetched one is given.
+                """
+                user_query = self.parse_goal(user_input)
+                if session is None:
+                    vocab_table = self.find_candidates(user_query, user_id)
+                    print("vocab_table: ", vocab_table)
                 else:
-                    user_query = self.query_agent.query(user_input)
-                    print('user_query:', user_query) # returns exam, topic, and keywords
-                    user_query_exam = user_query['exam']
-
-                    # Compute the average of keywords
-                    candidate_vocab = []
-                    for word in user_query['keywords']:
-                        keyword_emb = self.embedding.encode(word)
-                        keyword_table = self.db.query_by_similarity(keyword_emb, n_results=10)
-                        for row in keyword_table:
-                            if user_query_exam == None or (user_query_exam == "GRE" and row['GRE'] == True) or (user_query_exam == "IELTS" and row['IELTS'] == True):
-                                candidate_vocab.append((row['word'], row['CEFR'], row['understanding_rating']))
-                    print("candidate_vocab: ", candidate_vocab)
-
-                    # Save query log
-                    self.query_log[user_input] = candidate_vocab
-                    self.save_query_log()
-
-                vocab_table = [item for item in candidate_vocab if item[2] < 0.5]
+                    vocab_table = session['candidates']
+                    print("Starting the prefetched session.")
 
                 # Check whether the user has already mastered the words
                 if len(vocab_table) == 0:
@@ -107,27 +181,69 @@ class VocabTrainerGUI():
                     updates[component_map['ui-1']] = gr.update(visible=True)
                     updates[component_map['ui-2']] = gr.update(visible=False)
                     
-                    return updates
+                    yield updates
+                    return
 
-                selected_words = self.ranking_agent.query(vocab_table=vocab_table, num_words=self.num_words)
+                if session is None:
+                    selected_words = self.select_words(user_query, vocab_table)
+                    # Reveal each question as soon as it is available, from the bank or as the LLM writes it
+                    questions = session_questions(self.question_bank, self.question_agent, selected_words,
+                                                  self.num_questions, self.refiller)
+                else:
+                    selected_words = session['words']
+                    questions = ((question_type, question) for question_type, items in session['questions'].items()
+                                 for question in items)
                 print('selected_words:', selected_words)
+
+                # Plan the next round while this quiz is answered
+                self.prefetch_next_session(round_key(request, user_input), user_query, user_id, selected_words)
                 
                 print("Generating questions...")
-                data = self.question_agent.query(word_list=selected_words, num_questions=self.num_questions)
-                print(data)
-
+                data = {question_type: [] for question_type in QUESTION_TYPES}
                 updates = [gr.update() for _ in range(len(components))]
                 updates[component_map['question-data']] = data
+                updates[component_map['goal']] = user_input
+                updates[component_map['user']] = user_id
                 updates[component_map['ui-1']] = gr.update(visible=False)
                 updates[component_map['ui-2']] = gr.update(visible=True)
-                updates[component_map['quiz_submit_btn']] = gr.update(visible=True)
-                
+                # Answers can only be submitted once every question has arrived
+                updates[component_map['quiz_submit_btn']] = gr.update(visible=False)
+                updates[component_map['next_btn']] = gr.update(visible=False)
+                updates[component_map['info']] = gr.update(visible=False)
+
                 # Hide all questions initially
                 for i in range(component_map['1-1-q'], component_map[f'4-{MAX_PROBLEM_NUM}-s'] + 1):
                     updates[i] = gr.update(visible=False)
-                
-                # Populate multiple-choice questions
-                for i, question in enumerate(data["multiple-choice"]):
+                yield updates
+
+                for question_type, question in questions:
+                    if question_type not in data or len(data[question_type]) >= MAX_PROBLEM_NUM:
+                        continue
+                    data[question_type].append(question)
+                    updates = [gr.update() for _ in range(len(components))]
+                    updates[component_map['question-data']] = data
+                    show_question(updates, question_type, len(data[question_type]) - 1, question)
+                    yield updates
+                print(data)
+
+                updates = [gr.update() for _ in range(len(components))]
+                updates[component_map['question-data']] = data
+                updates[component_map['quiz_submit_btn']] = gr.update(visible=True)
+                yield updates
+
+            def start_btn_click(user_input, name, request: gr.Request):
+                yield from start_session(user_input, learner_id(name, request), request)
+
+            def next_btn_click(goal, user_id, request: gr.Request):
+                # The prefetched session is used unless grading changed the candidates materially
+                candidates = [row[0] for row in self.find_candidates(self.parse_goal(goal), user_id)]
+                yield from start_session(goal, user_id, request, self.prefetcher.take(round_key(request, goal), candidates))
+
+            def show_question(updates, question_type, i, question):
+                """
+                Fill in the components of the i-th question of a type.
+                """
+                if question_type == 'multiple-choice':
                     updates[component_map[f'1-{i+1}-q']] = gr.update(
                         visible=True,
                         value=f"### {i+1}. {question['question']}"
@@ -138,9 +254,8 @@ class VocabTrainerGUI():
                         choices=question['choices'],
                         value=None
                     )
-                
-                # Populate matching questions
-                for i, question in enumerate(data["matching"]):
+
+                elif question_type == 'matching':
                     q = f"### {i+1}. Match the words with the correct definitions.\n\n"
                     q += f"**Definitions:**\n\n"
                     definitions = question['definitions']
@@ -151,7 +266,7 @@ class VocabTrainerGUI():
                         visible=True,
                         value=q
                     )
-                    for j, word in enumerate(question['words']):
+                    for j, word in enumerate(question['words'][:MAX_MATCHING_WORD_NUM]):
                         updates[component_map[f'2-{i+1}-{j+1}-a']] = gr.update(
                             label=f'Choose a definition for "{word}":',
                             visible=True,
@@ -159,9 +274,8 @@ class VocabTrainerGUI():
                             choices=definition_labels,
                             value=None
                         )
-                
-                # Populate short answer questions
-                for i, question in enumerate(data["short-answer"]):
+
+                elif question_type == 'short-answer':
                     updates[component_map[f'3-{i+1}-q']] = gr.update(
                         visible=True,
                         value=f"### {i+1}. {question['question']}"
@@ -171,9 +285,8 @@ class VocabTrainerGUI():
                         interactive=True,
                         value=""
                     )
-                
-                # Populate scenario-based questions
-                for i, question in enumerate(data["scenario-based"]):
+
+                elif question_type == 'scenario-based':
                     updates[component_map[f'4-{i+1}-q']] = gr.update(
                         visible=True,
                         value=f"### {i+1}. {question['question']}"
@@ -185,8 +298,6 @@ class VocabTrainerGUI():
                         value=None
                     )
 
-                return updates
-
             def quiz_back_btn_click():
                 updates = [gr.update() for _ in range(len(components))]
                 updates[component_map['info']] = gr.update(visible=False)
@@ -194,7 +305,7 @@ class VocabTrainerGUI():
                 updates[component_map['ui-1']] = gr.update(visible=True)
                 return updates
             
-            def quiz_submit_btn_click(*args):
+            def quiz_submit_btn_click(request: gr.Request, *args):
                 def get_score_html(score):
                     hue = score * 120
                     return f'<strong><p style="color: hsl({hue}, 100%, 20%);">Score: {score:.2f}</p></strong>'
@@ -203,54 +314,85 @@ class VocabTrainerGUI():
                 updates[component_map['quiz_submit_btn']] = gr.update(visible=False)
                 updates[component_map['info']] = gr.update(visible=True)
                 data = args[component_map["question-data"]]
-                
+
+                # Grade every question first, so ratings are written in a single update
+                answers = {}
                 for i, question in enumerate(data["multiple-choice"]):
                     user_ans = args[component_map[f'1-{i+1}-a']]
                     user_ans = chr(question['choices'].index(user_ans) + ord('A'))
-                    score_map = self.analyzer_agent.query(question, user_ans)
-                    for word, rating in list(score_map.items()):
-                        if self.db.update_understanding_rating(word=word, new_rating=rating) == False:
-                            score_map[word] = 0
-                    score_html = get_score_html(score_map[question['word']])
-                    score_html += f"<p><strong>Correct answer: {question['correct_answer']}</strong></p>"
-                    updates[component_map[f'1-{i+1}-s']] = gr.update(visible=True, value=score_html)
-                
+                    answers[('1', i)] = ('multiple-choice', question, user_ans)
+
                 for i, question in enumerate(data["matching"]):
                     user_ans = ""
-                    for j in range(len(question['words'])):
+                    for j in range(len(question['words'][:MAX_MATCHING_WORD_NUM])):
                         if j > 0:
                             user_ans += ", "
                         arg = args[component_map[f'2-{i+1}-{j+1}-a']]
                         user_ans += f'{j+1}-{arg}'
-                    score_map = self.analyzer_agent.query(question, user_ans)
-                    for word, rating in list(score_map.items()):
-                        if self.db.update_understanding_rating(word=word, new_rating=rating) == False:
-                            score_map[word] = 0
-                    for j, word in enumerate(question['words']):
-                        score_html = get_score_html(score_map[word])
-                        score_html += f"<p><strong>Correct answer: {question['correct_matches'][f'{j+1}']}</strong></p>"
-                        updates[component_map[f'2-{i+1}-{j+1}-s']] = gr.update(visible=True, value=score_html)
-                
+                    answers[('2', i)] = ('matching', question, user_ans)
+
                 for i, question in enumerate(data["short-answer"]):
                     user_ans = args[component_map[f'3-{i+1}-a']]
-                    score_map = self.analyzer_agent.query(question, user_ans)
-                    for word, rating in list(score_map.items()):
-                        if self.db.update_understanding_rating(word=word, new_rating=rating) == False:
-                            score_map[word] = 0
-                    score_html = get_score_html(score_map[question['word']])
-                    updates[component_map[f'3-{i+1}-s']] = gr.update(visible=True, value=score_html)
+                    answers[('3', i)] = ('short-answer', question, user_ans)
 
                 for i, question in enumerate(data["scenario-based"]):
                     user_ans = args[component_map[f'4-{i+1}-a']]
                     user_ans = chr(question['choices'].index(user_ans) + ord('A'))
-                    score_map = self.analyzer_agent.query(question, user_ans)
-                    for word, rating in list(score_map.items()):
-                        if self.db.update_understanding_rating(word=word, new_rating=rating) == False:
+                    answers[('4', i)] = ('scenario-based', question, user_ans)
+
+                # Objective questions are checked against their answer keys, only the others reach
+                # the analyzer, in one request or concurrently with one request each
+                score_maps = {key: grader.grade(*answer) for key, answer in answers.items() if grader.can_grade(*answer[:2])}
+                remaining = [key for key in answers if key not in score_maps]
+                grade = self.analyzer_agent.query_batch if config.GRADING_MODE == 'batch' else self.analyzer_agent.query_many
+                score_maps.update(zip(remaining, grade([answers[key][1:] for key in remaining])))
+                # Words of a matching question beyond the ones shown were never answered, so they are not rated
+                for i, question in enumerate(data["matching"]):
+                    shown = question['words'][:MAX_MATCHING_WORD_NUM]
+                    score_maps[('2', i)] = {word: score for word, score in score_maps[('2', i)].items() if word in shown}
+
+                # Words tested by several questions are rated with their average score
+                ratings = {}
+                for score_map in score_maps.values():
+                    for word, rating in score_map.items():
+                        ratings.setdefault(word, []).append(rating)
+                ratings = {word: sum(values) / len(values) for word, values in ratings.items()}
+                user_id = args[component_map['user']]
+                missing = set(self.db.update_understanding_ratings(ratings, user_id=user_id))
+                for score_map in score_maps.values():
+                    for word in score_map:
+                        if word in missing:
                             score_map[word] = 0
-                    score_html = get_score_html(score_map[question['word']])
+
+                for i, question in enumerate(data["multiple-choice"]):
+                    score_html = get_score_html(score_maps[('1', i)][question['word']])
+                    score_html += f"<p><strong>Correct answer: {question['correct_answer']}</strong></p>"
+                    updates[component_map[f'1-{i+1}-s']] = gr.update(visible=True, value=score_html)
+
+                for i, question in enumerate(data["matching"]):
+                    for j, word in enumerate(question['words'][:MAX_MATCHING_WORD_NUM]):
+                        score_html = get_score_html(score_maps[('2', i)][word])
+                        score_html += f"<p><strong>Correct answer: {question['correct_matches'][f'{j+1}']}</strong></p>"
+                        updates[component_map[f'2-{i+1}-{j+1}-s']] = gr.update(visible=True, value=score_html)
+
+                for i, question in enumerate(data["short-answer"]):
+                    score_html = get_score_html(score_maps[('3', i)][question['word']])
+                    updates[component_map[f'3-{i+1}-s']] = gr.update(visible=True, value=score_html)
+
+                for i, question in enumerate(data["scenario-based"]):
+                    score_html = get_score_html(score_maps[('4', i)][question['word']])
                     score_html += f"<p><strong>Correct answer: {question['correct_answer']}</strong></p>"
                     updates[component_map[f'4-{i+1}-s']] = gr.update(visible=True, value=score_html)
-                
+
+                # Replan the next round from the actual ratings if they moved its candidates too far
+                goal = args[component_map['goal']]
+                user_query = self.parse_goal(goal)
+                candidates = [row[0] for row in self.find_candidates(user_query, user_id)]
+                if self.prefetcher.is_stale(round_key(request, goal), candidates):
+                    print("Grading changed the candidate words, planning the next round again.")
+                    self.prefetch_next_session(round_key(request, goal), user_query, user_id, ())
+                updates[component_map['next_btn']] = gr.update(visible=True)
+
                 return updates
 
             # Center-aligned title and matching font size/style
@@ -281,8 +423,9 @@ class VocabTrainerGUI():
                     user_input = gr.Textbox(label="Your Learning Goal:")
                     component_map['user_input'] = len(components)
                     components.append(user_input)
+                    learner_name = gr.Textbox(label="Your Name (optional, keeps your progress across visits):")
                     start_btn = gr.Button("Confirm Goal", variant="primary")
-                    start_btn.click(start_btn_click, user_input, components)
+                    start_btn.click(start_btn_click, [user_input, learner_name], components)
 
                 # Right Column: Previous Learning Goals
                 with gr.Column():
@@ -301,9 +444,13 @@ class VocabTrainerGUI():
                             value=goal,
                             elem_id=f"goal-button-{goal}"  # Add unique IDs for buttons
                         )
+                        # A generator function, so Gradio streams its updates
+                        def goal_btn_click(name, request: gr.Request, g=goal):  # Pass the learning goal (key)
+                            yield from start_btn_click(g, name, request)
+
                         goal_button.click(
-                            lambda g=goal: start_btn_click(g),  # Pass the learning goal (key)
-                            inputs=[],
+                            goal_btn_click,
+                            inputs=[learner_name],
                             outputs=components
                         )
 
@@ -374,16 +521,25 @@ class VocabTrainerGUI():
                     components.append(gr.HTML())
                 
                 quiz_submit_btn = gr.Button("Submit", variant="primary")
+                next_btn = gr.Button("Next Round", variant="primary", visible=False)
                 quiz_back_btn = gr.Button("Back", variant="secondary")
 
             component_map['question-data'] = len(components)
             components.append(gr.State())
+            # Goal of the quiz on screen, kept per browser session
+            component_map['goal'] = len(components)
+            components.append(gr.State())
+            # Learner whose ratings the quiz on screen reads and writes
+            component_map['user'] = len(components)
+            components.append(gr.State())
             component_map['ui-1'] = len(components)
             components.append(main_interface)
             component_map['ui-2'] = len(components)
             components.append(quiz_interface)
             component_map['quiz_submit_btn'] = len(components)
             components.append(quiz_submit_btn)
+            component_map['next_btn'] = len(components)
+            components.append(next_btn)
             component_map['info'] = len(components)
             components.append(gr.HTML('<strong><u style="color: hsl(120, 100%, 20%);">Results are saved!</u></strong>', visible=False))
 
@@ -391,9 +547,9 @@ class VocabTrainerGUI():
             components.append(alert_component)
             component_map['alert'] = len(components) - 1
 
-            start_btn.click(start_btn_click, user_input, components)
             quiz_back_btn.click(quiz_back_btn_click, None, components)
-            quiz_submit_btn.click(quiz_submit_btn_click, components[:component_map[f'question-data'] + 1], components)
+            quiz_submit_btn.click(quiz_submit_btn_click, components[:component_map['user'] + 1], components)
+            next_btn.click(next_btn_click, [components[component_map['goal']], components[component_map['user']]], components)
 
         demo.launch()
 